@@ -12,15 +12,23 @@ End-to-end CLI:
 
 from __future__ import annotations
 import argparse
+import contextlib
 import csv
+import hashlib
+import itertools
 import json
 import logging
+import os
 import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import AbstractSet, Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
 import uuid
 import re
 import random
+from collections import defaultdict, deque
 
 # ---------- Setup logging ----------
 logging.basicConfig(
@@ -29,10 +37,42 @@ logging.basicConfig(
 )
 log = logging.getLogger("ifc_to_canonical")
 
+from json_io import loads as _loads
+
+# ---------- Optional: faster JSON encoding ----------
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+def _dumps(obj: Any) -> str:
+    """Compact UTF-8 JSON for CSV cells (orjson when installed; stdlib json for
+    what orjson cannot encode, e.g. non-str keys)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False)
+
+# ---------- Optional: pyarrow for the Parquet copy of asset_props ----------
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = pq = None
+
+# ---------- Optional: numpy for batched unit conversion ----------
+try:
+    import numpy as np
+except Exception:
+    np = None
+
 # ---------- Import llm_runner ----------
 try:
     from llm_runner import class_mapping as llm_class_map
     from llm_runner import property_extraction as llm_prop_extract
+    from llm_runner import init_llm_client
 except Exception as e:
     log.error("Cannot import llm_runner: %s", e)
     raise
@@ -66,9 +106,15 @@ def read_text_if_exists(p: Path) -> str:
 # Deterministic TE: unit normalization
 # =========================
 
+# One pattern, one search per value: the first alternative is a diameter-style
+# "<num> mm|cm|in|\"|'" anywhere in the string; only if there is none does the
+# second alternative take the first "<num>[unit]". (A plain `diam|num`
+# alternation would instead prefer whichever matches leftmost.)
 _NUM_UNIT_RE = re.compile(
-    r"""(?xi)
-    (?P<num>
+    r"""(?xis)
+    ^.*?(?:[øØφphi]*\s*(?P<dnum>\d+(?:\.\d+)?)\s*(?P<dunit>mm|cm|in|\"|'))
+    |
+    ^.*?(?P<num>
         [-+]?\d{1,3}(?:,\d{3})*(?:\.\d+)? |
         [-+]?\d+(?:\.\d+)?
     )
@@ -76,7 +122,6 @@ _NUM_UNIT_RE = re.compile(
     (?P<unit>[a-zA-Z°/%³²^/]+)?
     """
 )
-_DIAM_RE = re.compile(r"(?i)[øØφphi]*\s*(?P<num>\d+(?:\.\d+)?)\s*(?P<unit>mm|cm|in|\"|')")
 
 # Canonical name kinds (aliases)
 NAME_ALIASES = {
@@ -95,6 +140,7 @@ NAME_ALIASES = {
     # Others
     "percent":"percent","percentage":"percent","efficiency":"percent","angle":"angle",
 }
+NAME_ALIASES = {k: sys.intern(v) for k, v in NAME_ALIASES.items()}
 
 # Canonical units
 UNIT_CANON = {
@@ -110,73 +156,202 @@ UNIT_CANON = {
     "m/s":"m/s","rpm":"RPM","hz":"Hz",
     "%":"%",
 }
+# Interned so that unit comparisons and table lookups on canonical units
+# (e.g. "m²", "°C", "L/s") can short-circuit on identity
+UNIT_CANON = {k: sys.intern(v) for k, v in UNIT_CANON.items()}
+
+# Possible first characters of a string float() accepts: sign, digit, '.', or
+# nan/inf spellings; whitespace (left by removing commas) and non-ASCII
+# (float() takes Unicode digits) are passed through to float()
+_NUM_FIRST = frozenset("+-.0123456789nNiI")
 
 def _to_float(x) -> Optional[float]:
     if x is None: return None
     if isinstance(x,(int,float)): return float(x)
     s = str(x).strip().replace(",", "")
+    # Cheap reject for obvious non-numbers instead of raising/catching in float()
+    if not s or (s[0] not in _NUM_FIRST and s[0].isascii() and not s[0].isspace()):
+        return None
     try:
         return float(s)
-    except Exception:
+    except ValueError:
         return None
 
+@lru_cache(maxsize=512)
+def _canon_unit(u: str) -> str:
+    """Canonical spelling of a raw unit string (the set of raw units is small)."""
+    return UNIT_CANON.get(u.lower(), u)
+
+def _is_plain_number(s: str) -> bool:
+    """
+    True for "[+-]ddd[.d+]" with 1-3 ASCII integer digits: the only bare-number
+    shape for which _NUM_UNIT_RE yields exactly float(s) (longer integer parts,
+    exponents and commas are cut short by the pattern), so the search can be skipped.
+    """
+    body = s[1:] if s[:1] in ("+", "-") else s
+    ip, dot, fp = body.partition(".")
+    return (
+        0 < len(ip) <= 3 and ip.isascii() and ip.isdigit()
+        and (not dot or (fp.isascii() and fp.isdigit()))
+    )
+
 def _parse_num_unit_from_string(s: str) -> Tuple[Optional[float], Optional[str]]:
     if not isinstance(s, str):
         return _to_float(s), None
     s = s.strip()
-    m = _DIAM_RE.search(s)
-    if m:
-        v = _to_float(m.group("num"))
-        u = UNIT_CANON.get(m.group("unit").lower(), m.group("unit"))
-        return v, u
+    if _is_plain_number(s):
+        return float(s), None
     m = _NUM_UNIT_RE.search(s)
     if not m:
         return _to_float(s), None
+    if m.group("dnum") is not None:
+        return _to_float(m.group("dnum")), _canon_unit(m.group("dunit"))
     v = _to_float(m.group("num"))
     u = m.group("unit")
     if u:
-        u = UNIT_CANON.get(u.lower(), u)
+        u = _canon_unit(u)
     return v, u
 
+# Exact property names (after NAME_ALIASES) that the substring rules below do not cover
+_KIND_BY_NAME = {
+    **dict.fromkeys(["perimeter", "invertelevation", "span"], "length"),
+    **dict.fromkeys(["pitchangle", "slope", "roll"], "angle"),
+    **dict.fromkeys(
+        ["thermaltransmittance", "heat transfer coefficient (u)", "u-value", "u_value"], "thermal_u"
+    ),
+    **dict.fromkeys(["thermal resistance (r)", "thermal resistance", "r-value", "r_value"], "thermal_r"),
+    **NAME_ALIASES,
+}
+
+_LENGTH_SUFFIXES = ("_mm", "_m", "_cm", "_ft")
+_LENGTH_MARKERS = ("(mm)", "(m)", "(ft)")
+
+# Substring rules, first hit wins (order matters, e.g. "offset" before "area")
+_KIND_SUBSTRINGS = (
+    (("height", "depth", "width", "length", "thickness"), "length"),
+    (("area",), "area"),
+    (("volume",), "volume"),
+    (("pressure",), "pressure"),
+    (("temp",), "temperature"),
+    (("flow", "cfm"), "vol_flow"),
+    (("velocity",), "velocity"),
+    (("power", "btu"), "power"),
+    (("voltage",), "voltage"),
+    (("current",), "current"),
+    (("frequency",), "frequency"),
+    (("percent",), "percent"),
+)
+
+@lru_cache(maxsize=4096)
 def _canon_kind(name: str) -> str:
     n = (name or "").strip().lower()
-    if n in NAME_ALIASES: return NAME_ALIASES[n]
-    if n.endswith("_mm") or "(mm)" in n: return "length"
-    if n.endswith("_m") or "(m)" in n: return "length"
-    if n.endswith("_cm"): return "length"
-    if n.endswith("_ft") or "(ft)" in n: return "length"
-    # Additional length/distance properties
-    if n in ["perimeter", "invertelevation", "span"]: return "length"
-    if "offset" in n and not "angle" in n: return "length"
-    if "height" in n or "depth" in n or "width" in n or "length" in n or "thickness" in n: return "length"
-    if "area" in n: return "area"
-    if "volume" in n: return "volume"
-    if "pressure" in n: return "pressure"
-    if "temperature" in n or "temp" in n: return "temperature"
-    if "flow" in n or "cfm" in n: return "vol_flow"
-    if "velocity" in n: return "velocity"
-    if "power" in n or "btu" in n: return "power"
-    if "voltage" in n: return "voltage"
-    if "current" in n: return "current"
-    if "frequency" in n: return "frequency"
-    if "percent" in n or n.endswith("_pct"): return "percent"
-    # Angle properties
-    if n in ["pitchangle", "slope", "roll", "angle"]: return "angle"
+    kind = _KIND_BY_NAME.get(n)
+    if kind: return kind
+    # Unit-tagged names and offsets (but not offset angles) are lengths
+    if n.endswith(_LENGTH_SUFFIXES) or any(m in n for m in _LENGTH_MARKERS): return "length"
+    if "offset" in n and "angle" not in n: return "length"
+    for patterns, kind in _KIND_SUBSTRINGS:
+        if any(p in n for p in patterns): return kind
+    if n.endswith("_pct"): return "percent"
     if "angle" in n: return "angle"
-    # Thermal properties
-    if n in ["thermaltransmittance", "heat transfer coefficient (u)", "u-value", "u_value"]: return "thermal_u"
-    if n in ["thermal resistance (r)", "thermal resistance", "r-value", "r_value"]: return "thermal_r"
     return "unknown"
 
-def normalize_unit(name: str, value, unit: Optional[str], unit_overrides: Dict[str, Any] | None = None):
-    """Return (value_norm, unit_norm, reason)."""
+# Unit conversion tables: kind -> {unit: (offset, mul, div, unit_norm, reason)}
+# value_norm = (v + offset) * mul / div, the same operations (and order) as the
+# per-unit formulas, so results are unchanged.
+_LENGTH_CONV = {
+    "m":  (0, 1.0, 1.0, "m", "ok"),
+    "mm": (0, 1.0, 1000.0, "m", "mm_to_m"),
+    "cm": (0, 1.0, 100.0, "m", "cm_to_m"),
+    "in": (0, 0.0254, 1.0, "m", "in_to_m"),
+    "ft": (0, 0.3048, 1.0, "m", "ft_to_m"),
+}
+_AREA_CONV = {
+    **dict.fromkeys(["m²", "m2"], (0, 1.0, 1.0, "m²", "ok")),
+    **dict.fromkeys(["mm²", "mm2"], (0, 1.0, 1e6, "m²", "mm2_to_m2")),
+    **dict.fromkeys(["cm²", "cm2"], (0, 1.0, 1e4, "m²", "cm2_to_m2")),
+    **dict.fromkeys(["ft²", "ft2", "ft^2", "sqft", "sf"], (0, 0.09290304, 1.0, "m²", "ft2_to_m2")),
+}
+_VOLUME_CONV = {
+    **dict.fromkeys(["m³", "m3"], (0, 1.0, 1.0, "m³", "ok")),
+    **dict.fromkeys(["L", "l"], (0, 1.0, 1000.0, "m³", "L_to_m3")),
+    "mL": (0, 1.0, 1e6, "m³", "mL_to_m3"),
+    **dict.fromkeys(["ft³", "ft3"], (0, 0.0283168466, 1.0, "m³", "ft3_to_m3")),
+    **dict.fromkeys(["gal", "gallon"], (0, 0.00378541178, 1.0, "m³", "gal_to_m3")),
+}
+_FLOW_CONV = {
+    "L/s": (0, 1.0, 1.0, "L/s", "ok"),
+    **dict.fromkeys(["L/min", "lpm"], (0, 1.0, 60.0, "L/s", "Lpm_to_Lps")),
+    **dict.fromkeys(["m³/h", "m3/h"], (0, 1000, 3600.0, "L/s", "m3h_to_Lps")),
+    **dict.fromkeys(["m³/s", "m3/s"], (0, 1000.0, 1.0, "L/s", "m3s_to_Lps")),
+    "CFM": (0, 0.47194745, 1.0, "L/s", "cfm_to_Lps"),
+    "GPM": (0, 0.0630902, 1.0, "L/s", "gpm_to_Lps"),
+}
+_TEMP_CONV = {
+    **dict.fromkeys(["°C", "C", "c"], (0, 1.0, 1.0, "°C", "ok")),
+    **dict.fromkeys(["°F", "F", "f"], (-32, 5.0, 9.0, "°C", "F_to_C")),
+    "K": (-273.15, 1.0, 1.0, "°C", "K_to_C"),
+}
+_PRESSURE_CONV = {
+    "Pa":  (0, 1.0, 1.0, "Pa", "ok"),
+    "kPa": (0, 1000.0, 1.0, "Pa", "kPa_to_Pa"),
+    "MPa": (0, 1e6, 1.0, "Pa", "MPa_to_Pa"),
+    "bar": (0, 1e5, 1.0, "Pa", "bar_to_Pa"),
+    "psi": (0, 6894.75729, 1.0, "Pa", "psi_to_Pa"),
+}
+_POWER_CONV = {
+    "kW":    (0, 1.0, 1.0, "kW", "ok"),
+    "W":     (0, 1.0, 1000.0, "kW", "W_to_kW"),
+    "hp":    (0, 0.745699872, 1.0, "kW", "hp_to_kW"),
+    "BTU/h": (0, 0.00029307107, 1.0, "kW", "BTUh_to_kW"),
+}
+# Keys of the tables below are lower-case (matched case-insensitively)
+_ANGLE_CONV = {
+    **dict.fromkeys(["deg", "degree", "degrees", "°"], (0, 1.0, 1.0, "deg", "ok")),
+    **dict.fromkeys(["rad", "radian", "radians"], (0, 57.295779513, 1.0, "deg", "rad_to_deg")),
+}
+_THERMAL_U_CONV = {
+    **dict.fromkeys(
+        ["w/(m²·k)", "w/(m2·k)", "w/(m²k)", "w/(m2k)", "w/m²k", "w/m2k"],
+        (0, 1.0, 1.0, "W/(m²·K)", "ok"),
+    ),
+    **dict.fromkeys(
+        ["btu/(h·ft²·°f)", "btu/(h·ft2·°f)", "btu/(h·ft²·f)", "btu/(h·ft2·f)"],
+        (0, 5.678263337, 1.0, "W/(m²·K)", "btu_to_W_per_m2K"),
+    ),
+}
+_THERMAL_R_CONV = {
+    **dict.fromkeys(["m²·k/w", "m2·k/w", "m²k/w", "m2k/w"], (0, 1.0, 1.0, "m²·K/W", "ok")),
+    **dict.fromkeys(
+        ["ft²·h·°f/btu", "ft2·h·°f/btu", "ft²·°f·h/btu", "ft2·f·h/btu"],
+        (0, 0.1761101838, 1.0, "m²·K/W", "ft2Fh_to_m2K_per_W"),
+    ),
+}
+
+# kind -> (table, unit when missing, reason when missing, reason when unknown unit, fold case)
+_KIND_RULES = {
+    "length":      (_LENGTH_CONV, "m", "assume_m", "length_noop", False),
+    "area":        (_AREA_CONV, "m²", "assume_m2", "area_noop", False),
+    "volume":      (_VOLUME_CONV, "m³", "assume_m3", "volume_noop", False),
+    "vol_flow":    (_FLOW_CONV, "L/s", "assume_Lps", "flow_noop", False),
+    "temperature": (_TEMP_CONV, "°C", "assume_C", "temp_noop", False),
+    "pressure":    (_PRESSURE_CONV, "Pa", "assume_Pa", "press_noop", False),
+    "power":       (_POWER_CONV, "kW", "assume_kW", "power_noop", False),
+    "angle":       (_ANGLE_CONV, "deg", "assume_deg", "angle_noop", True),
+    "thermal_u":   (_THERMAL_U_CONV, "W/(m²·K)", "assume_W_per_m2K", "thermal_u_noop", True),
+    "thermal_r":   (_THERMAL_R_CONV, "m²·K/W", "assume_m2K_per_W", "thermal_r_noop", True),
+}
+
+def _resolve_value_unit(name: str, value, unit: Optional[str], unit_overrides: Dict[str, Any] | None = None):
+    """Return (kind, value as float or None, canonical unit or None) for one property."""
     kind = _canon_kind(name)
     v, u = None, None
 
     # Overrides: default units (only fill when unit is missing)
     default_u = None
-    if unit_overrides and "defaults" in unit_overrides:
-        default_u = unit_overrides["defaults"].get((name or "").strip().lower())
+    defaults_map = unit_overrides.get("defaults") if unit_overrides else None
+    if defaults_map:
+        default_u = defaults_map.get((name or "").strip().lower())
 
     # Parse value and unit
     if isinstance(value, str):
@@ -187,71 +362,33 @@ def normalize_unit(name: str, value, unit: Optional[str], unit_overrides: Dict[s
         u = unit or default_u
 
     if u:
-        u = UNIT_CANON.get((u or "").lower(), u)
+        u = _canon_unit(u)
+    return kind, v, u
 
+def _table_entry(kind: str, u: Optional[str]):
+    """Conversion-table entry (offset, mul, div, unit_norm, reason) for kind/unit, or None."""
+    rule = _KIND_RULES.get(kind)
+    if rule is None or not u:
+        return None
+    table, _, _, _, fold_case = rule
+    return table.get(u.lower() if fold_case else u)
+
+def _convert(kind: str, v: Optional[float], u: Optional[str]):
+    """Return (value_norm, unit_norm, reason) for a resolved value/unit."""
     if v is None:
         return None, u, "no_value"
 
-    # Length -> m
-    if kind == "length":
-        if not u or u == "m": return v, "m", "ok" if u else "assume_m"
-        if u == "mm": return v/1000.0, "m", "mm_to_m"
-        if u == "cm": return v/100.0, "m", "cm_to_m"
-        if u == "in": return v*0.0254, "m", "in_to_m"
-        if u == "ft": return v*0.3048, "m", "ft_to_m"
-        return v, u, "length_noop"
-
-    # Area -> m²
-    if kind == "area":
-        if not u or u in ["m²","m2"]: return v, "m²", "ok" if u else "assume_m2"
-        if u in ["mm²","mm2"]: return v/1e6, "m²", "mm2_to_m2"
-        if u in ["cm²","cm2"]: return v/1e4, "m²", "cm2_to_m2"
-        if u in ["ft²","ft2","ft^2","sqft","sf"]: return v*0.09290304, "m²", "ft2_to_m2"
-        return v, u, "area_noop"
-
-    # Volume -> m³
-    if kind == "volume":
-        if not u or u in ["m³","m3"]: return v, "m³", "ok" if u else "assume_m3"
-        if u in ["L","l"]: return v/1000.0, "m³", "L_to_m3"
-        if u == "mL": return v/1e6, "m³", "mL_to_m3"
-        if u in ["ft³","ft3"]: return v*0.0283168466, "m³", "ft3_to_m3"
-        if u in ["gal","gallon"]: return v*0.00378541178, "m³", "gal_to_m3"
-        return v, u, "volume_noop"
-
-    # Volume flow -> L/s
-    if kind == "vol_flow":
-        if not u: return v, "L/s", "assume_Lps"
-        if u in ["L/s"]: return v, "L/s", "ok"
-        if u in ["L/min","lpm"]: return v/60.0, "L/s", "Lpm_to_Lps"
-        if u in ["m³/h","m3/h"]: return v*1000/3600.0, "L/s", "m3h_to_Lps"
-        if u in ["m³/s","m3/s"]: return v*1000.0, "L/s", "m3s_to_Lps"
-        if u == "CFM": return v*0.47194745, "L/s", "cfm_to_Lps"
-        if u == "GPM": return v*0.0630902, "L/s", "gpm_to_Lps"
-        return v, u, "flow_noop"
-
-    # Temperature -> °C
-    if kind == "temperature":
-        if not u or u in ["°C","C","c"]: return v, "°C", "ok" if u else "assume_C"
-        if u in ["°F","F","f"]: return (v-32)*5.0/9.0, "°C", "F_to_C"
-        if u == "K": return v-273.15, "°C", "K_to_C"
-        return v, u, "temp_noop"
-
-    # Pressure -> Pa
-    if kind == "pressure":
-        if not u or u == "Pa": return v, "Pa", "ok" if u else "assume_Pa"
-        if u == "kPa": return v*1000.0, "Pa", "kPa_to_Pa"
-        if u == "MPa": return v*1e6, "Pa", "MPa_to_Pa"
-        if u == "bar": return v*1e5, "Pa", "bar_to_Pa"
-        if u == "psi": return v*6894.75729, "Pa", "psi_to_Pa"
-        return v, u, "press_noop"
-
-    # Power -> kW
-    if kind == "power":
-        if not u or u == "kW": return v, "kW", "ok" if u else "assume_kW"
-        if u == "W": return v/1000.0, "kW", "W_to_kW"
-        if u == "hp": return v*0.745699872, "kW", "hp_to_kW"
-        if u == "BTU/h": return v*0.00029307107, "kW", "BTUh_to_kW"
-        return v, u, "power_noop"
+    # Table-driven conversions (length/area/volume/flow/temperature/pressure/power/angle/thermal)
+    rule = _KIND_RULES.get(kind)
+    if rule is not None:
+        table, default_unit, assume_reason, noop_reason, fold_case = rule
+        if not u:
+            return v, default_unit, assume_reason
+        entry = table.get(u.lower() if fold_case else u)
+        if entry is None:
+            return v, u, noop_reason
+        offset, mul, div, unit_norm, reason = entry
+        return (v + offset if offset else v) * mul / div, unit_norm, reason
 
     # Voltage / Current / Frequency / Percent
     if kind == "voltage":
@@ -264,47 +401,75 @@ def normalize_unit(name: str, value, unit: Optional[str], unit_overrides: Dict[s
         if 0 <= v <= 1 and (u is None or u==""):
             return v*100.0, "%", "fraction_to_percent"
         return v, "%" if not u else u, "ok"
-    
-    # Angle -> degrees
-    if kind == "angle":
-        if not u or u.lower() in ["deg", "degree", "degrees", "°"]:
-            return v, "deg", "ok" if u else "assume_deg"
-        u_lower = str(u).lower()
-        if u_lower in ["rad", "radian", "radians"]:
-            return v * 57.295779513, "deg", "rad_to_deg"
-        return v, u, "angle_noop"
-    
-    # Thermal properties
-    # ThermalTransmittance (U-value) -> W/(m²·K)
-    if kind == "thermal_u":
-        if not u or u.lower() in ["w/(m²·k)", "w/(m2·k)", "w/(m²k)", "w/(m2k)", "w/m²k", "w/m2k"]:
-            return v, "W/(m²·K)", "ok" if u else "assume_W_per_m2K"
-        u_lower = str(u).lower()
-        if u_lower in ["btu/(h·ft²·°f)", "btu/(h·ft2·°f)", "btu/(h·ft²·f)", "btu/(h·ft2·f)"]:
-            return v * 5.678263337, "W/(m²·K)", "btu_to_W_per_m2K"
-        return v, u, "thermal_u_noop"
-    
-    # Thermal Resistance (R-value) -> m²·K/W
-    if kind == "thermal_r":
-        if not u or u.lower() in ["m²·k/w", "m2·k/w", "m²k/w", "m2k/w", "m²·k/w", "m2·k/w"]:
-            return v, "m²·K/W", "ok" if u else "assume_m2K_per_W"
-        u_lower = str(u).lower()
-        if u_lower in ["ft²·h·°f/btu", "ft2·h·°f/btu", "ft²·°f·h/btu", "ft2·f·h/btu"]:
-            return v * 0.1761101838, "m²·K/W", "ft2Fh_to_m2K_per_W"
-        return v, u, "thermal_r_noop"
 
     return v, u, "noop"
 
+def normalize_unit(name: str, value, unit: Optional[str], unit_overrides: Dict[str, Any] | None = None):
+    """Return (value_norm, unit_norm, reason)."""
+    return _convert(*_resolve_value_unit(name, value, unit, unit_overrides))
+
+# Fewest table-convertible values in a pack worth a numpy call
+VECTORIZE_MIN = 8
+
+def normalize_units(
+    items: List[Tuple[str, Any, Optional[str]]],
+    unit_overrides: Dict[str, Any] | None = None,
+) -> List[Tuple[Optional[float], Optional[str], str]]:
+    """
+    normalize_unit() over a pack's (name, value, unit) items. When at least
+    VECTORIZE_MIN values have a conversion-table entry, they are converted in
+    one numpy expression over per-value offset/mul/div arrays; everything else
+    goes through the scalar path. Elementwise numpy arithmetic performs the
+    same operations as the scalar formula, so results are identical.
+    """
+    resolved = [_resolve_value_unit(n, v, u, unit_overrides) for n, v, u in items]
+    out: List[Any] = [None] * len(resolved)
+
+    idx: List[int] = []
+    entries: List[Tuple[Any, ...]] = []
+    if np is not None and len(resolved) >= VECTORIZE_MIN:
+        for i, (kind, v, u) in enumerate(resolved):
+            if v is not None:
+                entry = _table_entry(kind, u)
+                if entry is not None:
+                    idx.append(i)
+                    entries.append(entry)
+
+    if len(idx) >= VECTORIZE_MIN:
+        n = len(idx)
+        vals = np.fromiter((resolved[i][1] for i in idx), dtype=np.float64, count=n)
+        offset, mul, div = (
+            np.fromiter((e[j] for e in entries), dtype=np.float64, count=n) for j in range(3)
+        )
+        # offset only where non-zero, as in the scalar path (keeps -0.0)
+        converted = (np.where(offset != 0, vals + offset, vals) * mul / div).tolist()
+        for i, entry, val in zip(idx, entries, converted):
+            out[i] = (val, entry[3], entry[4])
+
+    for i, r in enumerate(resolved):
+        if out[i] is None:
+            out[i] = _convert(*r)
+    return out
+
 # =========================
 # Validation
 # =========================
 
-def validate_required(props_flat: Dict[str, Any], required: List[str]) -> List[str]:
-    missing = []
-    for k in (required or []):
-        if k not in props_flat or props_flat.get(k) in (None, "", [], {}):
-            missing.append(k)
-    return missing
+def compile_required_rules(rule_required: Dict[str, Any]) -> Dict[str, Tuple[str, ...]]:
+    """
+    canonical_class -> required property names, built once per run.
+    Supports both formats: a list, or a dict with a 'required' key.
+    """
+    compiled = {}
+    for cls, required in (rule_required or {}).items():
+        if isinstance(required, dict):
+            required = required.get("required", [])
+        compiled[cls] = tuple(required) if isinstance(required, list) else ()
+    return compiled
+
+def validate_required(present: AbstractSet[str], required: Sequence[str]) -> List[str]:
+    """Required names not in `present` (names with a usable value), in rule order."""
+    return [k for k in (required or ()) if k not in present]
 
 def check_ranges(props_rows, range_table):
     flags = []
@@ -468,18 +633,145 @@ def validate_keywords(
 # =========================
 # Helpers
 # =========================
+_UUID_NAMESPACE = uuid.NAMESPACE_DNS.bytes
+
 def stable_uuid(source: str, local_id: str) -> str:
-    name = f"{source}:{local_id}"
-    return str(uuid.uuid5(uuid.NAMESPACE_DNS, name))
+    """
+    str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{source}:{local_id}")), computed directly
+    with hashlib (no UUID object). The ids must not change: reviewed queues and
+    evaluations join on asset_id.
+    """
+    h = bytearray(hashlib.sha1(_UUID_NAMESPACE + f"{source}:{local_id}".encode("utf-8")).digest()[:16])
+    h[6] = (h[6] & 0x0F) | 0x50  # version 5
+    h[8] = (h[8] & 0x3F) | 0x80  # RFC 4122 variant
+    x = h.hex()
+    return f"{x[:8]}-{x[8:12]}-{x[12:16]}-{x[16:20]}-{x[20:]}"
 
-def flatten_known_props(entity_props: Dict[str, Any]) -> Dict[str, Any]:
-    flat = {}
+class RowWriter:
+    """
+    csv.writer over an open file: header written up front, rows counted.
+    Rows are also passed to `mirror` (e.g. a ParquetRowWriter) when given.
+    """
+
+    def __init__(self, f, headers: List[str], mirror=None):
+        self._w = csv.writer(f)
+        self._w.writerow(headers)
+        self.count = 0
+        self.mirror = mirror
+
+    def writerow(self, row: Tuple[Any, ...]) -> None:
+        self._w.writerow(row)
+        self.count += 1
+        if self.mirror is not None:
+            self.mirror.writerow(row)
+
+    def writerows(self, rows: List[Tuple[Any, ...]]) -> None:
+        self._w.writerows(rows)
+        self.count += len(rows)
+        if self.mirror is not None:
+            self.mirror.writerows(rows)
+
+# Rows buffered per Parquet record batch
+PARQUET_BATCH_ROWS = 65536
+
+# Cells pandas.read_csv reads back as missing by default (its na_values)
+_CSV_NA_STRINGS = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+
+class ParquetRowWriter:
+    """
+    Streams rows (tuples in `schema` column order) to a zstd Parquet file in
+    record batches. String cells are written as the CSV shows them (str(v)),
+    and cells pandas would read back from the CSV as missing are null, so
+    metrics computed from either file agree.
+    Used as a context manager; the file only appears under its final name
+    once complete (written to <path>.tmp and renamed on a clean exit).
+    """
+
+    def __init__(self, path: Path, schema):
+        self.path = path
+        self._tmp = path.with_name(path.name + ".tmp")
+        self._schema = schema
+        self._is_str = [pa.types.is_string(f.type) for f in schema]
+        self._cols: List[List[Any]] = [[] for _ in schema]
+        self._writer = None
+
+    def writerow(self, row: Tuple[Any, ...]) -> None:
+        for col, is_str, v in zip(self._cols, self._is_str, row):
+            if is_str and v is not None:
+                v = v if type(v) is str else str(v)
+                if v in _CSV_NA_STRINGS:
+                    v = None
+            col.append(v)
+        if len(self._cols[0]) >= PARQUET_BATCH_ROWS:
+            self.flush()
+
+    def writerows(self, rows: List[Tuple[Any, ...]]) -> None:
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self) -> None:
+        if not self._cols[0]:
+            return
+        arrays = [pa.array(col, type=f.type) for col, f in zip(self._cols, self._schema)]
+        self._writer.write_batch(pa.record_batch(arrays, schema=self._schema))
+        self._cols = [[] for _ in self._schema]
+
+    def __enter__(self):
+        self._writer = pq.ParquetWriter(str(self._tmp), self._schema, compression="zstd")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        self._writer.close()
+        if exc_type is None:
+            self._tmp.replace(self.path)
+        else:
+            self._tmp.unlink(missing_ok=True)
+        return False
+
+class RowBuffer:
+    """In-memory stand-in for RowWriter; worker processes send these rows back to the parent."""
+
+    def __init__(self):
+        self.rows: List[Tuple[Any, ...]] = []
+
+    def writerow(self, row: Tuple[Any, ...]) -> None:
+        self.rows.append(row)
+
+ASSETS_HEADERS = [
+    "asset_id","source","local_id","ifc_class","name",
+    "canonical_class","class_confidence","class_codes",
+    "location_site","location_building","location_level","location_space","true_class","review_status","reviewer_notes","review_timestamp",
+]
+PROPS_HEADERS = ["asset_id","name","value_raw","unit_raw","value_norm","unit_norm","confidence","source","te_reason"]
+_PROPS_FLOAT_COLS = {"value_norm", "confidence"}
+
+def props_parquet_schema():
+    return pa.schema([(c, pa.float64() if c in _PROPS_FLOAT_COLS else pa.string()) for c in PROPS_HEADERS])
+RELATIONS_HEADERS = ["asset_id","relation","direction","neighbor_class","neighbor_name","neighbor_uid"]
+FLAGS_HEADERS = ["asset_id","flag","reason"]
+
+class Prop(NamedTuple):
+    """One merged property of a pack (raw value/unit as found or extracted)."""
+    v: Any
+    u: Optional[str]
+    confidence: float
+    source: str  # "ifc" or "llm"
+
+def _iter_known_props(entity_props: Dict[str, Any]):
+    """(name, value) for every property of every property set, skipping 'id'."""
     for pset, kv in (entity_props or {}).items():
         if isinstance(kv, dict):
             for k, v in kv.items():
                 if k == "id": continue
-                flat[str(k)] = v
-    return flat
+                yield (k if type(k) is str else str(k)), v
+
+def flatten_known_props(entity_props: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(_iter_known_props(entity_props))
 
 # =========================
 # Core
@@ -492,16 +784,25 @@ def process_one_pack(
     top_n: int,
     model_cfg: Dict[str, Any],
     te_cfg: Dict[str, Any],
-    rule_required: Dict[str, Any],
+    rule_required: Dict[str, Tuple[str, ...]],
     rule_ranges: Dict[str, Any],
     neighbor_rules: Dict[str, Any],
     keyword_rules: Dict[str, Any],
     conf_threshold: float,
-    out_rows_assets: List[Dict[str, Any]],
-    out_rows_props: List[Dict[str, Any]],
-    out_rows_rel: List[Dict[str, Any]],
-    out_rows_flags: List[Dict[str, Any]],
+    unit_overrides: Dict[str, Any],
+    w_assets: RowWriter,
+    w_props: RowWriter,
+    w_rel: RowWriter,
+    w_flags: RowWriter,
+    out_review: List[Tuple[Any, ...]],
+    flags_by_asset: Dict[str, List[str]],
 ) -> None:
+    """
+    Map/normalize/validate one entity pack and stream its rows to the writers
+    (columns in the *_HEADERS order). Also records (asset_id, ifc_class, name,
+    canonical_class, class_confidence) in out_review and each flag name in
+    flags_by_asset for the review queue built at the end of the run.
+    """
 
     ent = pack.get("entity") or {}
     run_id = pack.get("run_id") or "unknown_run"
@@ -523,118 +824,106 @@ def process_one_pack(
     new_props = llm_prop_extract(pack, prop_tmpl, canonical, known_flat, top_n, model_cfg)
 
     # Merge properties; new_props overrides by name if duplicated
-    merged_props: Dict[str, Dict[str, Any]] = {}  # name -> {v,u,confidence,source}
     # existing
-    for k, v in known_flat.items():
-        merged_props[k] = {"v": v, "u": None, "confidence": 1.0, "source": "ifc"}
+    merged_props: Dict[str, Prop] = {k: Prop(v, None, 1.0, "ifc") for k, v in known_flat.items()}
     # newly extracted
     for rec in (new_props or []):
         k = str(rec.get("k"))
         if not k: continue
-        merged_props[k] = {
-            "v": rec.get("v"),
-            "u": rec.get("u"),
-            "confidence": float(rec.get("confidence") or 0.0),
-            "source": "llm",
-        }
+        merged_props[k] = Prop(rec.get("v"), rec.get("u"), float(rec.get("confidence") or 0.0), "llm")
 
-    # TE: unit normalization
-    unit_overrides = load_yaml(Path("rules/units_override.yaml"))
-    for name, obj in merged_props.items():
-        v_raw = obj.get("v")
-        u_raw = obj.get("u")
-        v_norm, u_norm, reason = normalize_unit(name, v_raw, u_raw, unit_overrides)
-        obj["value_raw"] = v_raw
-        obj["unit_raw"] = u_raw
-        obj["value_norm"] = v_norm
-        obj["unit_norm"] = u_norm
-        obj["te_reason"] = reason
+    # TE: unit normalization (batched per pack). Done before any row is
+    # written: it raises on malformed units (e.g. a non-string LLM unit), and
+    # a failed pack must not leave an asset row without its props/flags
+    normalized = normalize_units(
+        [(name, p.v, p.u) for name, p in merged_props.items()], unit_overrides
+    )
 
     # Write assets (1 row)
-    out_rows_assets.append({
-        "asset_id": asset_id,
-        "source": source,
-        "local_id": local_id,
-        "ifc_class": ent.get("ifc_class"),
-        "name": ent.get("name"),
-        "canonical_class": canonical,
-        "class_confidence": class_conf,
-        "class_codes": json.dumps(class_codes, ensure_ascii=False),
-        "location_site": None,   # derive from entity.spatial_path if needed
-        "location_building": None,
-        "location_level": None,
-        "location_space": None,
-        "true_class": "",              # to be filled during manual review
-        "review_status": "PENDING",    # PENDING / REVIEWED / UNCERTAIN
-        "reviewer_notes": "",          # free text
-        "review_timestamp": "", 
-    })
-
-    # Write props (N rows)
-    for name, obj in merged_props.items():
-        out_rows_props.append({
-            "asset_id": asset_id,
-            "name": name,
-            "value_raw": obj.get("value_raw"),
-            "unit_raw": obj.get("unit_raw"),
-            "value_norm": obj.get("value_norm"),
-            "unit_norm": obj.get("unit_norm"),
-            "confidence": obj.get("confidence"),
-            "source": obj.get("source"),
-            "te_reason": obj.get("te_reason"),
-        })
+    w_assets.writerow((
+        asset_id,
+        source,
+        local_id,
+        ent.get("ifc_class"),
+        ent.get("name"),
+        canonical,
+        class_conf,
+        _dumps(class_codes),
+        None,   # location_site: derive from entity.spatial_path if needed
+        None,   # location_building
+        None,   # location_level
+        None,   # location_space
+        "",           # true_class: to be filled during manual review
+        "PENDING",    # review_status: PENDING / REVIEWED / UNCERTAIN
+        "",           # reviewer_notes: free text
+        "",           # review_timestamp
+    ))
+    out_review.append((asset_id, ent.get("ifc_class"), ent.get("name"), canonical, class_conf))
+
+    # One pass over the properties that writes the props rows (N rows) and
+    # runs the per-value checks; their flags are emitted below, after the
+    # per-asset ones
+    present = set()   # names with a normalized value
+    value_flags: List[Tuple[str, str]] = []
+    ranges = rule_ranges or {}
+    for (name, p), (v_norm, u_norm, reason) in zip(merged_props.items(), normalized):
+        w_props.writerow((
+            asset_id,
+            name,
+            p.v,
+            p.u,
+            v_norm,
+            u_norm,
+            p.confidence,
+            p.source,
+            reason,
+        ))
+        if v_norm is None:
+            continue
+        present.add(name)
+        # Generic rule: no numeric property should be negative
+        if v_norm < 0:
+            value_flags.append(("NEGATIVE_VALUE", f"{name}={v_norm} < 0"))
+        # Range-based rules (global + class-specific from ranges.yaml)
+        msg = validate_ranges(name, v_norm, ranges, canonical)
+        if msg:
+            value_flags.append(("OUT_OF_RANGE", f"{name}: {msg}"))
 
     # Write relations (neighbors)
     for nb in (pack.get("neighbors") or []):
-        out_rows_rel.append({
-            "asset_id": asset_id,
-            "relation": nb.get("rel"),
-            "direction": nb.get("direction"),
-            "neighbor_class": nb.get("class"),
-            "neighbor_name": nb.get("name"),
-            "neighbor_uid": nb.get("uid"),
-        })
+        w_rel.writerow((
+            asset_id,
+            nb.get("rel"),
+            nb.get("direction"),
+            nb.get("class"),
+            nb.get("name"),
+            nb.get("uid"),
+        ))
+
+    asset_flags = flags_by_asset[asset_id]
+
+    def add_flag(flag: str, reason: str) -> None:
+        w_flags.writerow((asset_id, flag, reason))
+        asset_flags.append(flag)
 
     # Validation: flags
     # - Low AI confidence
     if class_conf < conf_threshold:
-        out_rows_flags.append({"asset_id": asset_id, "flag": "LOW_AI_CONF", "reason": f"class_conf={class_conf}"})
+        add_flag("LOW_AI_CONF", f"class_conf={class_conf}")
 
     # - MISSING_REQUIRED_PROPERTY / OUT_OF_RANGE
-    required = (rule_required or {}).get(canonical)
+    required = rule_required.get(canonical)
     if required:
-        # Support both formats: list or dict with 'required' key
-        if isinstance(required, dict):
-            required_list = required.get("required", [])
-        elif isinstance(required, list):
-            required_list = required
-        else:
-            required_list = []
-        
-        missing = validate_required(
-            {k: merged_props.get(k, {}).get("value_norm") for k in merged_props}, required_list
-        )
-        for k in missing:
-            out_rows_flags.append({"asset_id": asset_id, "flag": "MISSING_REQUIRED_PROPERTY", "reason": k})
+        for k in validate_required(present, required):
+            add_flag("MISSING_REQUIRED_PROPERTY", k)
 
-    for k, obj in merged_props.items():
-        v_norm = obj.get("value_norm")
-        # Generic rule: no numeric property should be negative
-        if isinstance(v_norm, (int, float)) and v_norm < 0:
-            out_rows_flags.append({
-                "asset_id": asset_id,
-                "flag": "NEGATIVE_VALUE",
-                "reason": f"{k}={v_norm} < 0"
-            })
-        # Range-based rules (global + class-specific from ranges.yaml)
-        msg = validate_ranges(k, v_norm, rule_ranges or {}, canonical)
-        if msg:
-            out_rows_flags.append({"asset_id": asset_id, "flag": "OUT_OF_RANGE", "reason": f"{k}: {msg}"})
+    for flag, reason in value_flags:
+        add_flag(flag, reason)
 
     # - INCONSISTENT_NEIGHBOR (simple expectation check)
     msg = validate_neighbors(canonical, pack.get("neighbors") or [], neighbor_rules or {})
     if msg:
-        out_rows_flags.append({"asset_id": asset_id, "flag": "INCONSISTENT_NEIGHBOR", "reason": msg})
+        add_flag("INCONSISTENT_NEIGHBOR", msg)
 
     # Keyword validation is SOFT - only warns, doesn't block
     # This is an addition, not a rule - meant to catch obvious inconsistencies
@@ -644,7 +933,83 @@ def process_one_pack(
         if msg:
             # Note: Could optionally disable this flag or make it INFO level
             # For now, keep it but understand it's a soft check, not a hard rule
-            out_rows_flags.append({"asset_id": asset_id, "flag": "KEYWORD_MISMATCH", "reason": msg})
+            add_flag("KEYWORD_MISMATCH", msg)
+
+# =========================
+# Parallel workers
+# =========================
+# Packs per task handed to a worker process (amortizes IPC), and tasks in
+# flight per worker: bounds how much input is read ahead of the writer
+PARALLEL_CHUNKSIZE = 64
+PARALLEL_TASKS_PER_WORKER = 2
+
+_WORKER_PACK_KWARGS: Dict[str, Any] = {}
+
+def _init_worker(pack_kwargs: Dict[str, Any]) -> None:
+    """ProcessPoolExecutor initializer: rules/templates/config are sent once per worker."""
+    global _WORKER_PACK_KWARGS
+    _WORKER_PACK_KWARGS = pack_kwargs
+
+def _error_head(line: bytes) -> str:
+    try:
+        return line.decode("utf-8", "replace")[:500]
+    except Exception:
+        return ""
+
+def _process_line(item: Tuple[int, bytes]):
+    """
+    Worker: run process_one_pack on one input line, collecting its rows instead
+    of writing them. Returns (index, [assets, props, relations, flags rows],
+    review summaries, flags_by_asset, error) where error is None or
+    (message, traceback, raw_head).
+    """
+    i, line = item
+    bufs = [RowBuffer() for _ in range(4)]
+    review: List[Tuple[Any, ...]] = []
+    flags: Dict[str, List[str]] = defaultdict(list)
+    err = None
+    try:
+        process_one_pack(
+            _loads(line), **_WORKER_PACK_KWARGS,
+            w_assets=bufs[0], w_props=bufs[1], w_rel=bufs[2], w_flags=bufs[3],
+            out_review=review, flags_by_asset=flags,
+        )
+    except Exception as e:
+        err = (str(e), traceback.format_exc().rstrip(), _error_head(line))
+    return i, [b.rows for b in bufs], review, dict(flags), err
+
+def _process_batch(items: List[Tuple[int, bytes]]) -> List[Tuple[Any, ...]]:
+    """Worker task: _process_line over a batch of input lines."""
+    return [_process_line(item) for item in items]
+
+def _bounded_map(pool: ProcessPoolExecutor, items, batch_size: int, window: int):
+    """
+    Like pool.map(_process_line, items, chunksize=batch_size), but with at most
+    `window` batches submitted at a time (Executor.map submits all of them up
+    front, i.e. reads the whole input). Yields the results in input order.
+    """
+    items = iter(items)
+    pending = deque()
+
+    def submit() -> bool:
+        batch = list(itertools.islice(items, batch_size))
+        if batch:
+            pending.append(pool.submit(_process_batch, batch))
+        return bool(batch)
+
+    while len(pending) < window and submit():
+        pass
+    while pending:
+        results = pending.popleft().result()
+        submit()
+        yield from results
+
+def _numbered_lines(f):
+    """(1-based line index, stripped line) for the non-empty lines of a file."""
+    for i, line in enumerate(f, 1):
+        line = line.strip()
+        if line:
+            yield i, line
 
 # =========================
 # CLI
@@ -659,6 +1024,10 @@ def main():
     runp.add_argument("--config", required=False, default="config.yaml", help="config.yaml")
     runp.add_argument("--limit", type=int, default=0, help="limit number of lines (0=all)")
     runp.add_argument("--tolerant", action="store_true", help="continue on errors")
+    runp.add_argument("--parquet", action="store_true",
+                      help="also write asset_props.parquet (needs pyarrow); compute_success_metrics.py reads it instead of the CSV")
+    runp.add_argument("--workers", type=int, default=1,
+                      help="worker processes for pack processing (1=in-process, 0=one per CPU)")
 
     args = ap.parse_args()
 
@@ -681,6 +1050,10 @@ def main():
                         "temperature": raw_model.get("temperature", 0.0)}
         else:
             model_cfg = {"model": "mock", "max_tokens": 800, "temperature": 0.0}
+        if str(model_cfg["model"] or "").strip().lower() != "mock":
+            # One keep-alive Ollama session for the whole run (closed at exit);
+            # opened before any worker fork, with no connections yet
+            init_llm_client()
 
         conf_threshold = float(cfg.get("confidence_threshold", 0.75))
         top_n = int(cfg.get("retrieval_top_n", 5))
@@ -688,62 +1061,120 @@ def main():
         # rules
         class_maps = load_yaml(Path("rules/class_maps.yaml"))
         allowed_classes = class_maps.get("allowed_classes") or list(set((class_maps.get("ifc_to_canonical") or {}).values()))
-        required_rules = load_yaml(Path("rules/required_props.yaml"))
+        required_rules = compile_required_rules(load_yaml(Path("rules/required_props.yaml")))
         ranges_rules = load_yaml(Path("rules/ranges.yaml"))
         neighbor_rules = load_yaml(Path("rules/neighbor_rules.yaml"))
         # keyword_validation rules merged into class_maps.yaml
         class_maps_with_keywords = load_yaml(Path("rules/class_maps.yaml"))
         keyword_rules = class_maps_with_keywords.get("keyword_validation") or {}
+        # loaded once here rather than per pack
+        unit_overrides = load_yaml(Path("rules/units_override.yaml"))
 
         # templates
         class_tmpl = read_text_if_exists(Path("prompt_templates/class_mapping.txt"))
         prop_tmpl = read_text_if_exists(Path("prompt_templates/property_extraction.txt"))
 
-        # outputs
-        assets_rows: List[Dict[str, Any]] = []
-        props_rows: List[Dict[str, Any]] = []
-        rel_rows: List[Dict[str, Any]] = []
-        flag_rows: List[Dict[str, Any]] = []
+        # outputs: streamed to CSV as packs are processed (constant memory in
+        # props/relations); only the per-asset review summary is kept
+        review_assets: List[Tuple[Any, ...]] = []
+        flags_by_asset: Dict[str, List[str]] = defaultdict(list)
+
+        pack_kwargs = dict(
+            class_tmpl=class_tmpl, prop_tmpl=prop_tmpl, allowed_classes=allowed_classes,
+            top_n=top_n, model_cfg=model_cfg,
+            te_cfg={}, rule_required=required_rules, rule_ranges=ranges_rules,
+            neighbor_rules=neighbor_rules, keyword_rules=keyword_rules,
+            conf_threshold=conf_threshold, unit_overrides=unit_overrides,
+        )
+        workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
 
         total = 0
         errors = 0
 
+        def dump_error(i: int, message: str, head: str) -> None:
+            err_path = Path("logs/errors/error_%s.json" % i)
+            err_payload = {
+                "index": i,
+                "error": message,
+                "raw_head": head
+            }
+            err_path.write_text(json.dumps(err_payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+        if args.parquet and pq is None:
+            log.warning("--parquet needs pyarrow; writing CSV only")
+        # Listed first so it is closed last, after asset_props.csv
+        # (metrics.py only prefers a Parquet copy that is not older than the CSV)
+        props_parquet = (
+            ParquetRowWriter(outdir / "asset_props.parquet", props_parquet_schema())
+            if args.parquet and pq is not None else contextlib.nullcontext()
+        )
+
         log.info("Reading %s ...", infile)
-        with infile.open("r", encoding="utf-8") as f:
-            for i, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-                total += 1
-                if args.limit and total > args.limit:
-                    break
+        with infile.open("rb") as f, \
+                props_parquet as props_pq, \
+                (outdir / "assets.csv").open("w", newline="", encoding="utf-8") as f_assets, \
+                (outdir / "asset_props.csv").open("w", newline="", encoding="utf-8") as f_props, \
+                (outdir / "asset_relations.csv").open("w", newline="", encoding="utf-8") as f_rel, \
+                (outdir / "asset_flags.csv").open("w", newline="", encoding="utf-8") as f_flags:
+            w_assets = RowWriter(f_assets, ASSETS_HEADERS)
+            w_props = RowWriter(f_props, PROPS_HEADERS, mirror=props_pq)
+            w_rel = RowWriter(f_rel, RELATIONS_HEADERS)
+            w_flags = RowWriter(f_flags, FLAGS_HEADERS)
+            numbered = _numbered_lines(f)
+
+            if workers <= 1:
+                for i, line in numbered:
+                    total += 1
+                    if args.limit and total > args.limit:
+                        break
+                    try:
+                        pack = _loads(line)
+                        process_one_pack(
+                            pack, **pack_kwargs,
+                            w_assets=w_assets, w_props=w_props, w_rel=w_rel, w_flags=w_flags,
+                            out_review=review_assets, flags_by_asset=flags_by_asset,
+                        )
+                    except Exception as e:
+                        errors += 1
+                        log.exception("Error on index=%s: %s", i, e)
+                        # dump head for debug
+                        dump_error(i, str(e), _error_head(line))
+                        if not args.tolerant:
+                            break
+            else:
+                # Packs are independent: process them in worker processes and
+                # write their rows here in input order
+                log.info("Processing packs with %d workers", workers)
+                lines = itertools.islice(numbered, args.limit) if args.limit else numbered
+                pool = ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_worker, initargs=(pack_kwargs,)
+                )
                 try:
-                    pack = json.loads(line)
-                    process_one_pack(
-                        pack, class_tmpl, prop_tmpl, allowed_classes, top_n, model_cfg,
-                        te_cfg={}, rule_required=required_rules, rule_ranges=ranges_rules,
-                        neighbor_rules=neighbor_rules, keyword_rules=keyword_rules,
-                        conf_threshold=conf_threshold,
-                        out_rows_assets=assets_rows, out_rows_props=props_rows,
-                        out_rows_rel=rel_rows, out_rows_flags=flag_rows
+                    results = _bounded_map(
+                        pool, lines, PARALLEL_CHUNKSIZE, workers * PARALLEL_TASKS_PER_WORKER
                     )
-                except Exception as e:
-                    errors += 1
-                    log.exception("Error on index=%s: %s", i, e)
-                    # dump head for debug
-                    try:
-                        head = line[:500]
-                    except Exception:
-                        head = ""
-                    err_path = Path("logs/errors/error_%s.json" % i)
-                    err_payload = {
-                        "index": i,
-                        "error": str(e),
-                        "raw_head": head
-                    }
-                    err_path.write_text(json.dumps(err_payload, ensure_ascii=False, indent=2), encoding="utf-8")
-                    if not args.tolerant:
-                        break
+                    for i, rows, review, flags, err in results:
+                        total += 1
+                        w_assets.writerows(rows[0])
+                        w_props.writerows(rows[1])
+                        w_rel.writerows(rows[2])
+                        w_flags.writerows(rows[3])
+                        review_assets.extend(review)
+                        for aid, fl in flags.items():
+                            flags_by_asset[aid].extend(fl)
+                        if err:
+                            errors += 1
+                            message, tb, head = err
+                            log.error("Error on index=%s: %s\n%s", i, message, tb)
+                            dump_error(i, message, head)
+                            if not args.tolerant:
+                                break
+                    else:
+                        # same count as the in-process loop, which reads one line past --limit
+                        if args.limit and total == args.limit and next(numbered, None) is not None:
+                            total += 1
+                finally:
+                    pool.shutdown(cancel_futures=True)
 
         # write CSVs
         def write_csv(path: Path, rows: List[Dict[str, Any]], headers: List[str]):
@@ -753,34 +1184,9 @@ def main():
                 for r in rows:
                     w.writerow({k: r.get(k) for k in headers})
 
-        write_csv(outdir / "assets.csv", assets_rows, [
-            "asset_id","source","local_id","ifc_class","name",
-            "canonical_class","class_confidence","class_codes",
-            "location_site","location_building","location_level","location_space","true_class","review_status","reviewer_notes","review_timestamp",
-        ])
-        write_csv(outdir / "asset_props.csv", props_rows, [
-            "asset_id","name","value_raw","unit_raw","value_norm","unit_norm","confidence","source","te_reason"
-        ])
-        write_csv(outdir / "asset_relations.csv", rel_rows, [
-            "asset_id","relation","direction","neighbor_class","neighbor_name","neighbor_uid"
-        ])
-        write_csv(outdir / "asset_flags.csv", flag_rows, [
-            "asset_id","flag","reason"
-        ])
-
         # ------------------------
         # NEW: build review_queue.csv for manual review
         # ------------------------
-        # Aggregate flags by asset_id
-        from collections import defaultdict
-
-        flags_by_asset = defaultdict(list)
-        for fr in flag_rows:
-            aid = fr.get("asset_id")
-            if not aid:
-                continue
-            flags_by_asset[aid].append(fr.get("flag"))
-
         # Define flag priority (for primary review order)
         flag_priority = {
             "LOW_AI_CONF": 0,
@@ -795,26 +1201,25 @@ def main():
             return sorted(flags, key=lambda f: flag_priority.get(f, 99))[0]
 
         review_rows: List[Dict[str, Any]] = []
-        for asset in assets_rows:
-            aid = asset.get("asset_id")
+        for aid, ifc_class, name, canonical_class, class_conf in review_assets:
             flags = flags_by_asset.get(aid, [])
             uniq_flags = sorted(set(f for f in flags if f))
             pf = primary_flag(uniq_flags)
 
             review_rows.append({
                 "asset_id": aid,
-                "ifc_class": asset.get("ifc_class"),
-                "name": asset.get("name"),
-                "canonical_class": asset.get("canonical_class"),
-                "class_confidence": asset.get("class_confidence"),
+                "ifc_class": ifc_class,
+                "name": name,
+                "canonical_class": canonical_class,
+                "class_confidence": class_conf,
                 # all flags collapsed into one cell for reviewer context
                 "flags": ";".join(uniq_flags),
                 "primary_flag": pf,
                 # review fields (same as in assets.csv, but easier to work with separately)
-                "true_class": asset.get("true_class", ""),
-                "review_status": asset.get("review_status", "PENDING"),
-                "reviewer_notes": asset.get("reviewer_notes", ""),
-                "review_timestamp": asset.get("review_timestamp", ""),
+                "true_class": "",
+                "review_status": "PENDING",
+                "reviewer_notes": "",
+                "review_timestamp": "",
             })
 
         # sort: flagged first, then by primary_flag priority, then by ascending confidence
@@ -869,10 +1274,10 @@ def main():
         # stage report
         stage_report = {
             "total_input_lines": total,
-            "assets_written": len(assets_rows),
-            "props_written": len(props_rows),
-            "relations_written": len(rel_rows),
-            "flags_written": len(flag_rows),
+            "assets_written": w_assets.count,
+            "props_written": w_props.count,
+            "relations_written": w_rel.count,
+            "flags_written": w_flags.count,
             "review_queue_size": len(review_rows),
             "errors": errors
         }
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+json_io.py — JSON / JSONL reading helpers shared by the pipeline and scripts/.
+
+orjson is used when installed; stdlib json otherwise.
+"""
+
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Iterator, Union
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse one JSON document (e.g. a JSONL line). orjson when installed;
+    stdlib json otherwise and for inputs orjson rejects (NaN/Infinity,
+    >64-bit ints)."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def iter_lines(file_path: Path) -> Iterator[bytes]:
+    """Lines of a file as bytes, read through a read-only mmap (no per-line buffering)."""
+    with Path(file_path).open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iter(mm.readline, b"")
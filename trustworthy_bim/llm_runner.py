@@ -7,25 +7,77 @@ llm_runner.py — resilient LLM wrapper with mock-classifier
 """
 
 from __future__ import annotations
+import atexit
+import contextlib
+import hashlib
+import heapq
 import json
 import logging
+import os
 import re
-from typing import Any, Dict, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+
+from json_io import loads as _loads
+from yaml_cache import load_yaml_cached
 
 # ---------------------------------------------------------------------
 # Low-noise logging
 # ---------------------------------------------------------------------
 logger = logging.getLogger(__name__)
 
+# Faster JSON for prompt fields when orjson is installed
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+
+def _loads_reply(raw: str, open_ch: str, close_ch: str) -> Any:
+    """
+    Parse an LLM reply expected to be one JSON object/array. If the whole text
+    is not valid JSON (e.g. wrapped in ```json fences or prose), retry on the
+    span from the first open_ch to the last close_ch.
+    """
+    try:
+        return _loads(raw)
+    except ValueError:
+        start, end = raw.find(open_ch), raw.rfind(close_ch)
+        if start < 0 or end <= start:
+            raise
+        return _loads(raw[start:end + 1])
+
+
+def _dumps(obj: Any) -> str:
+    """Compact UTF-8 JSON (orjson when installed; stdlib json for what orjson
+    cannot encode, e.g. non-str keys)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
 
 # ---------------------------------------------------------------------
 # Retrieved docs formatting (for prompts)
 # ---------------------------------------------------------------------
+def _rerank(d: Dict[str, Any]) -> float:
+    return d.get("rerank") or 0.0
+
+
 def _format_retrieved_block(retrieved_docs: List[Dict[str, Any]], top_n: int) -> str:
     if not retrieved_docs:
         return ""
-    docs = sorted(retrieved_docs, key=lambda d: -(d.get("rerank") or 0.0))[:top_n]
+    if 0 <= top_n < len(retrieved_docs):
+        # Top-N by rerank without sorting the whole list (ties keep input order)
+        docs = heapq.nlargest(top_n, retrieved_docs, key=_rerank)
+    else:
+        docs = sorted(retrieved_docs, key=_rerank, reverse=True)[:top_n]
     lines = []
     for i, d in enumerate(docs, 1):
         title = (d.get("title") or "").strip()
@@ -37,25 +89,61 @@ def _format_retrieved_block(retrieved_docs: List[Dict[str, Any]], top_n: int) ->
     return "\n---\n".join(lines)
 
 
+# class_mapping and property_extraction format the same pack back to back:
+# remember the last (docs list, top_n) -> block. The list itself is held,
+# so its identity cannot be reused by another pack while cached.
+_LAST_RETRIEVED: Tuple[Any, int, str] | None = None
+
+
+def _retrieved_block(pack: Dict[str, Any], top_n: int) -> str:
+    global _LAST_RETRIEVED
+    docs = pack.get("retrieved_docs", [])
+    last = _LAST_RETRIEVED
+    if last is not None and last[0] is docs and last[1] == top_n:
+        return last[2]
+    block = _format_retrieved_block(docs, top_n)
+    _LAST_RETRIEVED = (docs, top_n, block)
+    return block
+
+
 # ---------------------------------------------------------------------
 # Safe template rendering
 #   1) prefer [[var]] tokens (literal braces are harmless)
 #   2) try str.format(**mapping); if fails (KeyError due to literals), fallback
 #   3) fallback: build brace-safe JSON prompt programmatically
 # ---------------------------------------------------------------------
+_TOKEN_RE = re.compile(r"\[\[([^\[\]]+)\]\]")
+
+
+class _LazyFields(dict):
+    """
+    Template fields whose values are built on first lookup, so fields the
+    template never references (e.g. the JSON dumps of large property sets)
+    are never serialized. Unknown names still raise KeyError / get() default.
+    """
+
+    def __init__(self, factories: Dict[str, Callable[[], str]]):
+        super().__init__()
+        self._factories = factories
+
+    def __missing__(self, key: str) -> str:
+        value = self[key] = self._factories[key]()
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self._factories else default
+
 def _render_template_safe_or_none(tmpl: str, mapping: Dict[str, str]) -> str | None:
-    # 1) [[var]] style
-    out = tmpl
-    for k, v in mapping.items():
-        token = f"[[{k}]]"
-        if token in out:
-            out = out.replace(token, v)
-    if out != tmpl:
-        return out
+    # 1) [[var]] style: all tokens substituted in one left-to-right pass
+    #    (unknown tokens are left as-is; inserted values are not rescanned)
+    if "[[" in tmpl:
+        out = _TOKEN_RE.sub(lambda m: mapping.get(m.group(1), m.group(0)), tmpl)
+        if out != tmpl:
+            return out
 
     # 2) try {var} style directly
     try:
-        return tmpl.format(**mapping)
+        return tmpl.format_map(mapping)
     except Exception as e:
         logger.debug("Template format failed (%s). Will fallback to JSON-style prompt.", e)
         return None
@@ -70,6 +158,48 @@ def _render_template_safe_or_none(tmpl: str, mapping: Dict[str, str]) -> str | N
 #     # If you wire up a real endpoint, implement it here.
 #     raise NotImplementedError("Connect Llama here.")
 
+OLLAMA_GENERATE_URL = "http://localhost:11434/api/generate"
+
+# One keep-alive session per process, so consecutive calls reuse the TCP
+# connection to Ollama instead of reconnecting for every prompt. Created on
+# first use so that forked pipeline workers each open their own connections.
+_SESSION: requests.Session | None = None
+
+
+def _new_session(pool_size: int = 10) -> requests.Session:
+    s = requests.Session()
+    s.mount("http://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0))
+    s.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip, deflate"})
+    return s
+
+
+def _get_session() -> requests.Session:
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = _new_session()
+    return _SESSION
+
+
+def init_llm_client(pool_size: int = 10) -> None:
+    """
+    Open the shared Ollama session for a whole pipeline run (pool_size bounds
+    concurrent connections) and close it at interpreter exit. Optional:
+    run_llm creates the session on first use otherwise.
+    """
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = _new_session(pool_size)
+        atexit.register(close_llm_client)
+
+
+def close_llm_client() -> None:
+    """Close the shared Ollama session (safe to call more than once)."""
+    global _SESSION
+    if _SESSION is not None:
+        _SESSION.close()
+        _SESSION = None
+
+
 def run_llm(prompt: str, model: str, max_tokens: int = 1024, temperature: float = 0.0) -> str:
     """
     Generic LLM caller - memory-efficient stateless HTTP calls.
@@ -81,7 +211,10 @@ def run_llm(prompt: str, model: str, max_tokens: int = 1024, temperature: float
     - prompt 已經在 class_mapping / property_extraction 中加好：
       '請回傳有效 JSON' 的指示。
     - Each call is stateless: sends request, receives response, returns immediately.
-      No data is kept in RAM between calls - designed for Dockerized Ollama on GPU.
+      Only the HTTP connection is reused (shared keep-alive session).
+    - Deterministic calls (temperature == 0) are cached by (model, prompt,
+      max_tokens): a small in-memory LRU in front of an on-disk cache in
+      LLM_CACHE_DIR, so reruns with unchanged prompts skip Ollama entirely.
     - Endpoint: http://localhost:11434 (for Dockerized Ollama)
     """
     model_name = _normalize_model_name(model)
@@ -89,6 +222,60 @@ def run_llm(prompt: str, model: str, max_tokens: int = 1024, temperature: float
     if not model_name:
         raise ValueError("run_llm called with empty model name")
 
+    if float(temperature) == 0.0:
+        return _generate_cached(model_name, prompt, int(max_tokens), float(temperature))
+    return _generate(model_name, prompt, max_tokens, temperature)
+
+
+# ---------------------------------------------------------------------
+# Response cache for deterministic calls
+#   TRUSTWORTHY_BIM_LLM_CACHE=<dir> overrides the location; set it to an
+#   empty string to disable the on-disk layer
+# ---------------------------------------------------------------------
+LLM_CACHE_DIR = os.path.expanduser(
+    os.environ.get("TRUSTWORTHY_BIM_LLM_CACHE", "~/.cache/trustworthy_bim/llm")
+)
+
+
+def _cache_path(model_name: str, prompt: str, max_tokens: int, temperature: float) -> str | None:
+    if not LLM_CACHE_DIR:
+        return None
+    key = hashlib.blake2b(
+        f"{model_name}\0{max_tokens}\0{temperature!r}\0{prompt}".encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
+    return os.path.join(LLM_CACHE_DIR, key[:2], key + ".txt")
+
+
+@lru_cache(maxsize=256)
+def _generate_cached(model_name: str, prompt: str, max_tokens: int, temperature: float) -> str:
+    """_generate() behind the on-disk cache; failures are neither memoized nor stored."""
+    path = _cache_path(model_name, prompt, max_tokens, temperature)
+    if path is not None:
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                return f.read()
+        except OSError:
+            pass
+
+    text = _generate(model_name, prompt, max_tokens, temperature)
+
+    if path is not None:
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+            os.replace(tmp, path)  # atomic: concurrent workers never see partial files
+        except OSError as e:
+            logger.debug("LLM cache write failed (%s): %s", path, e)
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+    return text
+
+
+def _generate(model_name: str, prompt: str, max_tokens: int, temperature: float) -> str:
+    """POST one prompt to Ollama /api/generate and return the response text."""
     # Ollama /api/generate 文件的基本格式：
     # POST http://localhost:11434/api/generate
     # payload: { "model": "...", "prompt": "...", "stream": false, "options": { ... } }
@@ -106,9 +293,8 @@ def run_llm(prompt: str, model: str, max_tokens: int = 1024, temperature: float
 
     try:
         # Use localhost for Dockerized Ollama on GPU
-        # Each call is stateless - no data kept in RAM between calls
-        resp = requests.post(
-            "http://localhost:11434/api/generate",
+        resp = _get_session().post(
+            OLLAMA_GENERATE_URL,
             json=payload,
             timeout=600,
         )
@@ -118,7 +304,6 @@ def run_llm(prompt: str, model: str, max_tokens: int = 1024, temperature: float
         text = data.get("response", "")
         if not isinstance(text, str):
             raise ValueError(f"Ollama response missing 'response' text: {data}")
-        # Return immediately - stateless call, no data accumulation
         return text
     except Exception as e:
         logger.error("run_llm failed for model=%s: %s", model_name, e)
@@ -132,6 +317,13 @@ def run_llm(prompt: str, model: str, max_tokens: int = 1024, temperature: float
 def _norm(s: Any) -> str:
     return (s or "").strip().lower()
 
+
+@lru_cache(maxsize=8)
+def _is_mock(model: str | None) -> bool:
+    """model: mock? (checked per entity; the configured name never changes)"""
+    return _norm(model) == "mock"
+
+@lru_cache(maxsize=32)
 def _normalize_model_name(model: str | None) -> str:
     """
     Normalize model name for Ollama.
@@ -147,113 +339,148 @@ def _normalize_model_name(model: str | None) -> str:
     return m
 
 
-def _hit(name: str, keywords: List[str] | None) -> bool:
+def _keyword_pattern(keywords: List[str] | None) -> re.Pattern | None:
+    """One regex matching any of the (normalized) keywords as a substring."""
     if not keywords:
-        return False
-    n = _norm(name)
-    return any(_norm(kw) in n for kw in keywords)
+        return None
+    words = dict.fromkeys(_norm(kw) for kw in keywords)
+    return re.compile("|".join(map(re.escape, words)))
+
+
+def _hit(n: str, pattern: re.Pattern | None) -> bool:
+    """Does the already-normalized name contain any keyword of a label?"""
+    return pattern is not None and pattern.search(n) is not None
+
 
+CLASS_MAPS_PATH = "rules/class_maps.yaml"
 
-def _load_class_maps() -> Dict[str, Any]:
+
+class _ClassMapIndex(NamedTuple):
+    maps: Dict[str, Any]
+    keywords: Dict[str, re.Pattern | None]  # label -> _keyword_pattern(keyword_overrides[label])
+    allowed: FrozenSet[str]                 # allowed_classes
+
+
+_EMPTY_INDEX = _ClassMapIndex({}, {}, frozenset())
+
+# "IfcXxx" -> "Xxx" for the allowed_classes fallback
+_IFC_PREFIX_RE = re.compile(r"Ifc([A-Za-z0-9_]+)")
+
+
+@lru_cache(maxsize=4)
+def _class_map_index_cached(path: str, mtime_ns: int, size: int) -> _ClassMapIndex:
+    maps = load_yaml_cached(path, mtime_ns, size)
+    kw = maps.get("keyword_overrides") or {}
+    return _ClassMapIndex(
+        maps,
+        {label: _keyword_pattern(words) for label, words in kw.items()},
+        frozenset(maps.get("allowed_classes") or []),
+    )
+
+
+def _load_class_maps() -> _ClassMapIndex:
+    """class_maps.yaml plus compiled keyword patterns, rebuilt only when the file changes."""
+    try:
+        st = os.stat(CLASS_MAPS_PATH)
+    except OSError:
+        return _EMPTY_INDEX
     try:
-        import yaml  # local dependency
-        from pathlib import Path
-        p = Path("rules/class_maps.yaml")
-        if p.exists():
-            return yaml.safe_load(p.read_text(encoding="utf-8")) or {}
+        return _class_map_index_cached(CLASS_MAPS_PATH, st.st_mtime_ns, st.st_size)
     except Exception as e:
         logger.debug("Failed loading class_maps.yaml: %s", e)
-    return {}
+    return _EMPTY_INDEX
+
+
+# ---------------------------------------------------------------------
+# Per-IFC-class refinements for the mock classifier
+#   handler(name, ptype, keywords, canonical) -> canonical
+#   name/ptype are normalized; canonical is the ifc_to_canonical default
+# ---------------------------------------------------------------------
+_Handler = Callable[[str, str, Dict[str, Any], Optional[str]], Optional[str]]
+
+
+def _first_hit(name: str, kw: Dict[str, Any], labels: Sequence[str]) -> str | None:
+    """First label (in priority order) whose keywords occur in the name."""
+    for lab in labels:
+        if _hit(name, kw.get(lab)):
+            return lab
+    return None
+
+
+def _first_hit_or_default(*labels: str) -> _Handler:
+    return lambda name, ptype, kw, canonical: _first_hit(name, kw, labels) or canonical
+
+
+def _fixed(label: str) -> _Handler:
+    return lambda name, ptype, kw, canonical: label
+
+
+# Slab labels in priority order; each wins by PredefinedType or by name keyword
+_SLAB_LABELS = ("Foundation_Slab", "Floors", "Roof")
+_SLAB_BY_PTYPE = {"baseslab": "Foundation_Slab", "floor": "Floors", "roof": "Roof"}
+
+
+def _slab(name: str, ptype: str, kw: Dict[str, Any], canonical: str | None) -> str | None:
+    # Slab/Floor/Roof/Foundation via PredefinedType+name
+    by_ptype = _SLAB_BY_PTYPE.get(ptype)
+    for label in _SLAB_LABELS:
+        if label == by_ptype or _hit(name, kw.get(label)):
+            return label
+    return canonical or "Slabs"
+
 
+_COVERING_BY_PTYPE = {"ceiling": "Ceilings", "flooring": "Floors"}
 
-def _mock_map_to_tier1(ent: Dict[str, Any], class_maps: Dict[str, Any]) -> str | None:
+
+def _covering(name: str, ptype: str, kw: Dict[str, Any], canonical: str | None) -> str | None:
+    return _COVERING_BY_PTYPE.get(ptype, canonical)
+
+
+def _material_split(steel: str, concrete: str) -> _Handler:
+    # Column/Beam material split by name keywords (very heuristic)
+    return lambda name, ptype, kw, canonical: steel if _hit(name, kw.get(steel)) else concrete
+
+
+_IFC_HANDLERS: Dict[str, _Handler] = {
+    # Walls: external vs internal by name
+    "IfcWall": _first_hit_or_default("External walls (façade)", "Internal walls"),
+    "IfcSlab": _slab,
+    "IfcCovering": _covering,
+    "IfcColumn": _material_split("Column (Steel)", "Columns (Concrete)"),
+    "IfcBeam": _material_split("Beam (Steel)", "Beam (Concrete)"),
+    # Duct / Pipe / Cable / Conduit family
+    "IfcDuctSegment": _fixed("Flexible duct"),  # default
+    "IfcFireSuppressionTerminal": _first_hit_or_default("Sprinkler", "Extinguishers", "Hose reel", "Hydrant"),
+    "IfcFlowTerminal": _first_hit_or_default("Sink", "Hose reel", "Hydrant"),
+    "IfcLamp": _first_hit_or_default("Emergency lighting"),
+    "IfcAlarm": _first_hit_or_default("Fire Alarm Control panel", "Audible/visual discharge alarm"),
+    "IfcSensor": _fixed("Detector"),
+    "IfcLightFixture": _fixed("Lighting Fixture"),
+    "IfcSwitchingDevice": _fixed("Switch (various types)"),
+    "IfcOutlet": _fixed("Sockets"),
+    "IfcCableSegment": _fixed("Conduit"),
+    "IfcCableFitting": _fixed("Conduit fittings"),
+}
+
+
+def _mock_map_to_tier1(ent: Dict[str, Any], index: _ClassMapIndex) -> str | None:
     """Heuristic mapping using IFC class + attributes + name keywords."""
     ifc = ent.get("ifc_class") or ""
-    name = ent.get("name") or ""
-    attrs = ent.get("attributes") or {}
-    ptype = _norm(attrs.get("PredefinedType") or attrs.get("Predefinedtype") or "")
-
-    base_map: Dict[str, str] = (class_maps.get("ifc_to_canonical") or {})
-    kw: Dict[str, List[str]] = class_maps.get("keyword_overrides") or {}
+    base_map: Dict[str, str] = (index.maps.get("ifc_to_canonical") or {})
     canonical = base_map.get(ifc)
 
-    # ----- Walls: external vs internal by name -----
-    if ifc == "IfcWall":
-        if _hit(name, kw.get("External walls (façade)")):
-            canonical = "External walls (façade)"
-        elif _hit(name, kw.get("Internal walls")):
-            canonical = "Internal walls"
-
-    # ----- Slab/Floor/Roof/Foundation via PredefinedType+name -----
-    if ifc == "IfcSlab":
-        if ptype == "baseslab" or _hit(name, kw.get("Foundation_Slab")):
-            canonical = "Foundation_Slab"
-        elif ptype == "floor" or _hit(name, kw.get("Floors")):
-            canonical = "Floors"
-        elif ptype == "roof" or _hit(name, kw.get("Roof")):
-            canonical = "Roof"
-        else:
-            canonical = canonical or "Slabs"
-
-    if ifc == "IfcCovering":
-        if ptype == "ceiling":
-            canonical = "Ceilings"
-        elif ptype == "flooring":
-            canonical = "Floors"
-
-    # ----- Column/Beam material split by name keywords (very heuristic) -----
-    if ifc == "IfcColumn":
-        if _hit(name, kw.get("Column (Steel)")):
-            canonical = "Column (Steel)"
-        else:
-            canonical = "Columns (Concrete)"
-    if ifc == "IfcBeam":
-        if _hit(name, kw.get("Beam (Steel)")):
-            canonical = "Beam (Steel)"
-        else:
-            canonical = "Beam (Concrete)"
-
-    # ----- Duct / Pipe / Cable / Conduit family -----
-    if ifc == "IfcDuctSegment":
-        canonical = "Flexible duct"  # default
-    if ifc == "IfcFireSuppressionTerminal":
-        for lab in ["Sprinkler", "Extinguishers", "Hose reel", "Hydrant"]:
-            if _hit(name, kw.get(lab)):
-                canonical = lab
-                break
-    if ifc == "IfcFlowTerminal":
-        for lab in ["Sink", "Hose reel", "Hydrant"]:
-            if _hit(name, kw.get(lab)):
-                canonical = lab
-                break
-    if ifc == "IfcLamp":
-        if _hit(name, kw.get("Emergency lighting")):
-            canonical = "Emergency lighting"
-    if ifc == "IfcAlarm":
-        if _hit(name, kw.get("Fire Alarm Control panel")):
-            canonical = "Fire Alarm Control panel"
-        elif _hit(name, kw.get("Audible/visual discharge alarm")):
-            canonical = "Audible/visual discharge alarm"
-    if ifc == "IfcSensor":
-        canonical = "Detector"
-    if ifc == "IfcLightFixture":
-        canonical = "Lighting Fixture"
-    if ifc == "IfcSwitchingDevice":
-        canonical = "Switch (various types)"
-    if ifc == "IfcOutlet":
-        canonical = "Sockets"
-    if ifc == "IfcCableSegment":
-        canonical = "Conduit"
-    if ifc == "IfcCableFitting":
-        canonical = "Conduit fittings"
+    handler = _IFC_HANDLERS.get(ifc)
+    if handler is not None:
+        name = _norm(ent.get("name") or "")
+        attrs = ent.get("attributes") or {}
+        ptype = _norm(attrs.get("PredefinedType") or attrs.get("Predefinedtype") or "")
+        canonical = handler(name, ptype, index.keywords, canonical)
 
     # Fallback: IfcXxx → Xxx, only if inside allowed_classes
     if not canonical:
-        m = re.match(r"Ifc([A-Za-z0-9_]+)", ifc or "")
-        guess = m.group(1) if m else None
-        allowed = set(class_maps.get("allowed_classes") or [])
-        if guess in allowed:
-            canonical = guess
+        m = _IFC_PREFIX_RE.match(ifc)
+        if m and m.group(1) in index.allowed:
+            canonical = m.group(1)
 
     return canonical
 
@@ -269,19 +496,10 @@ def class_mapping(
     model_cfg: Dict[str, Any],
 ) -> Dict[str, Any]:
     ent = pack["entity"]
-    retrieved_block = _format_retrieved_block(pack.get("retrieved_docs", []), top_n)
-    neighbor_summary = {
-        "neighbors": [
-            {"class": (n.get("class") if isinstance(n, dict) else None),
-             "rel": (n.get("rel") if isinstance(n, dict) else None)}
-            for n in (pack.get("neighbors") or [])
-        ]
-    }
 
     # -------- MOCK path (no LLM needed) --------
-    if _norm(model_cfg.get("model")) == "mock":
-        class_maps = _load_class_maps()
-        canonical = _mock_map_to_tier1(ent, class_maps)
+    if _is_mock(model_cfg.get("model")):
+        canonical = _mock_map_to_tier1(ent, _load_class_maps())
         conf = 0.9 if canonical else 0.5
         return {
             "canonical_class": canonical,
@@ -290,17 +508,28 @@ def class_mapping(
         }
 
     # -------- Real-LLM path --------
-    mapping = {
-        "ifc_class": str(ent.get("ifc_class")),
-        "name": str(ent.get("name")),
-        "attributes": json.dumps(ent.get("attributes", {}), ensure_ascii=False),
-        "properties": json.dumps(ent.get("properties", {}), ensure_ascii=False),
-        "spatial_path": json.dumps(ent.get("spatial_path", []), ensure_ascii=False),
-        "neighbor_summary": json.dumps(neighbor_summary, ensure_ascii=False),
-        "top_n": str(top_n),
-        "retrieved_block": retrieved_block,
-        "allowed_classes": ", ".join(allowed_classes) if allowed_classes else "<no-constraint>",
-    }
+    # Every field, including the retrieved-docs block and the neighbour
+    # summary, is built only if the template (or the fallback) uses it
+    def neighbor_summary() -> Dict[str, Any]:
+        return {
+            "neighbors": [
+                {"class": (n.get("class") if isinstance(n, dict) else None),
+                 "rel": (n.get("rel") if isinstance(n, dict) else None)}
+                for n in (pack.get("neighbors") or [])
+            ]
+        }
+
+    mapping = _LazyFields({
+        "ifc_class": lambda: str(ent.get("ifc_class")),
+        "name": lambda: str(ent.get("name")),
+        "attributes": lambda: _dumps(ent.get("attributes", {})),
+        "properties": lambda: _dumps(ent.get("properties", {})),
+        "spatial_path": lambda: _dumps(ent.get("spatial_path", [])),
+        "neighbor_summary": lambda: _dumps(neighbor_summary()),
+        "top_n": lambda: str(top_n),
+        "retrieved_block": lambda: _retrieved_block(pack, top_n),
+        "allowed_classes": lambda: ", ".join(allowed_classes) if allowed_classes else "<no-constraint>",
+    })
 
     prompt = _render_template_safe_or_none(tmpl, mapping)
     if prompt is None:
@@ -314,8 +543,8 @@ def class_mapping(
                 "attributes": ent.get("attributes", {}),
                 "properties": ent.get("properties", {}),
                 "spatial_path": ent.get("spatial_path", []),
-                "neighbors": neighbor_summary["neighbors"],
-                "retrieved_topN": retrieved_block
+                "neighbors": neighbor_summary()["neighbors"],
+                "retrieved_topN": mapping["retrieved_block"]
             }, ensure_ascii=False, indent=2) +
             "\nTask:\n"
             f"1) Map to one canonical_class from this closed list: {mapping['allowed_classes']}.\n"
@@ -326,7 +555,7 @@ def class_mapping(
 
     try:
         raw = run_llm(prompt, **model_cfg)
-        data = json.loads(raw)
+        data = _loads_reply(raw, "{", "}")
         return {
             "canonical_class": data.get("canonical_class"),
             "confidence": float(data.get("confidence", 0.0)),
@@ -337,6 +566,30 @@ def class_mapping(
         return {"canonical_class": None, "confidence": 0.0, "class_codes": {}}
 
 
+def class_mapping_batch(
+    packs: Sequence[Dict[str, Any]],
+    tmpl: str,
+    allowed_classes: List[str],
+    top_n: int,
+    model_cfg: Dict[str, Any],
+    concurrency: int = 4,
+) -> List[Dict[str, Any]]:
+    """
+    class_mapping() over many packs, results in input order. For a real model
+    up to `concurrency` requests are in flight on the shared session (bounded
+    by its connection pool), so Ollama can queue the next prompt while one is
+    generating; mock mode and concurrency <= 1 run sequentially.
+    """
+    def one(pack: Dict[str, Any]) -> Dict[str, Any]:
+        return class_mapping(pack, tmpl, allowed_classes, top_n, model_cfg)
+
+    if concurrency <= 1 or len(packs) <= 1 or _is_mock(model_cfg.get("model")):
+        return [one(p) for p in packs]
+    _get_session()  # create it here rather than racing in the threads
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(packs))) as pool:
+        return list(pool.map(one, packs))
+
+
 # ---------------------------------------------------------------------
 # property_extraction: mock returns empty; real LLM path uses prompt
 # ---------------------------------------------------------------------
@@ -349,18 +602,17 @@ def property_extraction(
     model_cfg: Dict[str, Any],
 ) -> List[Dict[str, Any]]:
     # Mock: no extra properties
-    if _norm(model_cfg.get("model")) == "mock":
+    if _is_mock(model_cfg.get("model")):
         return []
 
     ent = pack["entity"]
-    retrieved_block = _format_retrieved_block(pack.get("retrieved_docs", []), top_n)
-    mapping = {
-        "canonical_class": str(canonical_class),
-        "known_props": json.dumps(known_props_flat, ensure_ascii=False),
-        "attributes": json.dumps(ent.get("attributes", {}), ensure_ascii=False),
-        "top_n": str(top_n),
-        "retrieved_block": retrieved_block,
-    }
+    mapping = _LazyFields({
+        "canonical_class": lambda: str(canonical_class),
+        "known_props": lambda: _dumps(known_props_flat),
+        "attributes": lambda: _dumps(ent.get("attributes", {})),
+        "top_n": lambda: str(top_n),
+        "retrieved_block": lambda: _retrieved_block(pack, top_n),
+    })
 
     prompt = _render_template_safe_or_none(tmpl, mapping)
     if prompt is None:
@@ -371,7 +623,7 @@ def property_extraction(
                 "canonical_class": canonical_class,
                 "known_props": known_props_flat,
                 "attributes": ent.get("attributes", {}),
-                "retrieved_topN": retrieved_block
+                "retrieved_topN": mapping["retrieved_block"]
             }, ensure_ascii=False, indent=2) +
             "\nTask:\n"
             'Return JSON array: [{"k":"<name>","v":<value or string>,"u":"<unit or null>","confidence":0.0}, ...]\n'
@@ -380,7 +632,7 @@ def property_extraction(
 
     try:
         raw = run_llm(prompt, **model_cfg)
-        arr = json.loads(raw)
+        arr = _loads_reply(raw, "[", "]")
         if isinstance(arr, list):
             return arr
     except Exception as e:
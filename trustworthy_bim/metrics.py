@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+metrics.py — success metrics for the IFC → Canonical pipeline outputs.
+
+Pure functions over the pipeline tables (assets / asset_props / asset_flags /
+review_queue) plus the column-projected readers they use. The CLI wrapper is
+compute_success_metrics.py.
+
+Everything here works column-wise on whole Series / numpy arrays. Keep it that
+way: no DataFrame.apply(axis=1), iterrows or per-row Python callbacks; where a
+per-row choice is needed use a mask with np.where (e.g.
+np.where(cc.isin(allowed), cc, "Other")).
+"""
+
+import os
+from typing import Collection, Dict, FrozenSet, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from yaml_cache import load_yaml_cached
+
+CLASS_MAP_PATH = "rules/class_maps.yaml"
+
+# Multi-threaded CSV parsing (and Parquet support) when pyarrow is installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    CSV_ENGINE = "pyarrow"
+except Exception:
+    pa = pa_csv = pq = None
+    CSV_ENGINE = "c"
+
+# Only the columns each metric actually reads
+ASSETS_COLS = {"asset_id": "string", "ifc_class": "string", "canonical_class": "string"}
+PROPS_COLS = {"value_raw": "string", "value_norm": "float64", "unit_norm": "string"}
+FLAGS_COLS = {"asset_id": "string"}
+REVIEW_COLS = {
+    "asset_id": "string",
+    "canonical_class": "string",
+    "true_class": "string",
+    "review_status": "string",
+}
+
+# Rows per chunk when streaming asset_props.csv
+PROPS_CHUNKSIZE = 1_000_000
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def load_allowed_classes() -> FrozenSet[str]:
+    """Read the allowed_classes set from class_maps.yaml (if present)."""
+    try:
+        st = os.stat(CLASS_MAP_PATH)
+        m = load_yaml_cached(CLASS_MAP_PATH, st.st_mtime_ns, st.st_size)
+        allowed = m.get("allowed_classes") or list(
+            set((m.get("ifc_to_canonical") or {}).values())
+        )
+        return frozenset(a for a in allowed if a)
+    except Exception:
+        return frozenset()
+
+
+def _parquet_sibling(csv_path: str) -> Optional[str]:
+    """Return <name>.parquet next to a CSV if pyarrow is available and it is not older."""
+    if pq is None:
+        return None
+    pq_path = os.path.splitext(csv_path)[0] + ".parquet"
+    try:
+        if os.stat(pq_path).st_mtime_ns >= os.stat(csv_path).st_mtime_ns:
+            return pq_path
+    except OSError:
+        pass
+    return None
+
+
+def _read_parquet_columns(
+    pq_path: str,
+    columns: Optional[Dict[str, str]],
+    chunksize: Optional[int],
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    pf = pq.ParquetFile(pq_path)
+    usecols = None
+    dtype: Dict[str, str] = {}
+    if columns is not None:
+        usecols = [c for c in columns if c in pf.schema_arrow.names]
+        dtype = {c: columns[c] for c in usecols}
+
+    if chunksize:
+        return (
+            b.to_pandas().astype(dtype)
+            for b in pf.iter_batches(batch_size=chunksize, columns=usecols)
+        )
+    return pf.read(columns=usecols).to_pandas().astype(dtype)
+
+
+def _csv_has_no_rows(path: str) -> bool:
+    """True for an empty or header-only CSV (checked without invoking the parser)."""
+    with open(path, "rb") as f:
+        f.readline()
+        return not f.read(64).strip()
+
+
+def read_columns(
+    path: str,
+    columns: Optional[Dict[str, str]] = None,
+    chunksize: Optional[int] = None,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    Read a pipeline table, parsing only `columns` ({name: dtype}) that exist in it.
+    columns=None reads every column with inferred dtypes.
+    With `chunksize`, returns an iterator of frames.
+
+    `path` is the CSV; an up-to-date Parquet copy next to it (same stem) is read
+    instead when pyarrow is installed, skipping CSV parsing entirely.
+    """
+    pq_path = _parquet_sibling(path)
+    if pq_path:
+        return _read_parquet_columns(pq_path, columns, chunksize)
+
+    if _csv_has_no_rows(path):
+        empty = pd.DataFrame(columns=list(columns or []))
+        return iter([empty]) if chunksize else empty
+
+    # pyarrow's CSV reader cannot chunk; fall back to the C engine for streaming
+    engine = "c" if chunksize else CSV_ENGINE
+    if columns is None:
+        return pd.read_csv(path, engine=engine, chunksize=chunksize)
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in columns if c in header]
+    dtype = {c: columns[c] for c in usecols}
+    return pd.read_csv(path, usecols=usecols, dtype=dtype, engine=engine, chunksize=chunksize)
+
+
+def write_csv(df: pd.DataFrame, path: str) -> None:
+    """
+    Write a frame as CSV without the index. Uses pyarrow's C++ writer when
+    installed (string cells come out quoted); falls back to DataFrame.to_csv.
+    """
+    if pa_csv is not None:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            table = None  # mixed-type object column; let pandas format it
+        if table is not None:
+            pa_csv.write_csv(table, path)
+            return
+    df.to_csv(path, index=False, lineterminator="\n")
+
+
+def compute_mapping_rate(assets_df: pd.DataFrame, allowed_classes: Collection[str]) -> float:
+    """
+    Compute the Tier-1 class mapping success rate (auto metric).
+    `allowed_classes` may be any container; a set/frozenset gives O(1) lookups.
+    """
+    if assets_df.empty or "canonical_class" not in assets_df.columns:
+        return 0.0
+
+    # Column-wise strip + membership test (no per-row Python call)
+    cc = assets_df["canonical_class"].fillna("").astype(str).str.strip()
+    mask = cc.ne("")
+    if allowed_classes:
+        mask &= cc.isin(allowed_classes)
+
+    rate = mask.mean() * 100.0
+    return float(rate)
+
+
+def _unit_norm_counts(props_df: pd.DataFrame) -> Tuple[int, int]:
+    """(normalized, with raw value) counts; boolean reductions on the raw arrays."""
+    vr = props_df["value_raw"].to_numpy()
+    vn = props_df["value_norm"].to_numpy()
+    un = props_df["unit_norm"].fillna("").to_numpy()
+
+    den = ~pd.isna(vr)
+    num = den & ~pd.isna(vn) & (un != "")
+    return int(num.sum()), int(den.sum())
+
+
+def compute_unit_normalization_rate(props_df: pd.DataFrame) -> float:
+    """Compute the success rate of unit normalization (auto metric)."""
+    if props_df.empty:
+        return 0.0
+
+    num, den = _unit_norm_counts(props_df)
+    if den == 0:
+        return 0.0
+
+    rate = num / den * 100.0
+    return float(rate)
+
+
+def stream_unit_normalization_rate(
+    props_path: str,
+    chunksize: int = PROPS_CHUNKSIZE,
+) -> Tuple[float, int]:
+    """
+    Same metric as compute_unit_normalization_rate, but reads asset_props.csv in
+    chunks so memory stays O(chunksize). Returns (rate, number of prop rows).
+    """
+    num_total = den_total = n_rows = 0
+    for chunk in read_columns(props_path, PROPS_COLS, chunksize=chunksize):
+        num, den = _unit_norm_counts(chunk)
+        num_total += num
+        den_total += den
+        n_rows += len(chunk)
+
+    rate = num_total / den_total * 100.0 if den_total > 0 else 0.0
+    return float(rate), n_rows
+
+
+# -----------------------------
+# Manual review–based metrics
+#   The functions below expect a frame passed through normalize_review()
+#   (done once by the caller at ingest, not per metric).
+# -----------------------------
+def normalize_review_status(review_df: pd.DataFrame) -> pd.Series:
+    """Upper-cased review_status as a categorical (empty string for missing values)."""
+    return review_df["review_status"].fillna("").astype(str).str.upper().astype("category")
+
+
+def normalize_review(review_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shallow copy of the review table with review_status normalized and
+    canonical_class / true_class stripped (empty string for missing values).
+    Columns that are absent stay absent.
+    """
+    cols: Dict[str, pd.Series] = {}
+    if "review_status" in review_df.columns:
+        cols["review_status"] = normalize_review_status(review_df)
+    for c in ("canonical_class", "true_class"):
+        if c in review_df.columns:
+            cols[c] = review_df[c].fillna("").astype(str).str.strip()
+    return review_df.assign(**cols)
+
+
+def _column(df: pd.DataFrame, col: str) -> pd.Series:
+    """Column of a normalized frame; all-empty if the column is absent."""
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[col]
+
+
+def review_counts(review_df: pd.DataFrame) -> Dict[str, int]:
+    """
+    Status/correctness tallies for the review table in a single reduction:
+      - reviewed:     review_status == 'REVIEWED' and non-empty true_class
+      - correct:      reviewed rows with canonical_class == true_class
+      - uncertain:    review_status == 'UNCERTAIN'
+      - reviewed_any: review_status in {'REVIEWED', 'UNCERTAIN'}
+    """
+    # Small integer codes per row (status in 0..2, label/correct bits), then
+    # one bincount instead of a separate masked sum per metric
+    status = pd.Categorical(review_df["review_status"], categories=["REVIEWED", "UNCERTAIN"])
+    tc = _column(review_df, "true_class").to_numpy()
+    cc = _column(review_df, "canonical_class").to_numpy()
+    labeled = tc != ""
+    key = (status.codes.astype(np.int64) + 1) * 4 + labeled * 2 + (cc == tc)
+    bins = np.bincount(key, minlength=12).reshape(3, 2, 2)
+
+    return {
+        "reviewed": int(bins[1, 1].sum()),
+        "correct": int(bins[1, 1, 1]),
+        "uncertain": int(bins[2].sum()),
+        "reviewed_any": int(bins[1:].sum()),
+    }
+
+
+def compute_manual_accuracy(
+    review_df: pd.DataFrame,
+    counts: Optional[Dict[str, int]] = None,
+) -> Optional[float]:
+    """
+    Manual accuracy = (correct predictions / total reviewed) × 100
+    Reviewed rows are those with review_status == 'REVIEWED' and non-empty true_class.
+
+    `counts` may carry a precomputed review_counts(review_df).
+    """
+    if review_df.empty:
+        return None
+    if not {"canonical_class", "true_class", "review_status"}.issubset(review_df.columns):
+        return None
+
+    counts = counts if counts is not None else review_counts(review_df)
+    if counts["reviewed"] == 0:
+        return None
+
+    acc = counts["correct"] / counts["reviewed"] * 100.0
+    return float(acc)
+
+
+def compute_uncertainty_rate(
+    review_df: pd.DataFrame,
+    counts: Optional[Dict[str, int]] = None,
+) -> Optional[float]:
+    """
+    Uncertainty rate = (uncertain cases / total reviewed) × 100
+
+    Where:
+      - uncertain cases: review_status == 'UNCERTAIN'
+      - total reviewed: rows with review_status in {'REVIEWED', 'UNCERTAIN'}
+                        (true_class may be empty for UNCERTAIN rows)
+
+    `counts` may carry a precomputed review_counts(review_df).
+    """
+    if review_df.empty:
+        return None
+    if "review_status" not in review_df.columns:
+        return None
+
+    counts = counts if counts is not None else review_counts(review_df)
+    if counts["reviewed_any"] == 0:
+        return None
+
+    rate = counts["uncertain"] / counts["reviewed_any"] * 100.0
+    return float(rate)
+
+
+def compute_flag_precision(
+    flags_df: pd.DataFrame,
+    review_df: pd.DataFrame,
+) -> Optional[float]:
+    """
+    Flag precision ≈ (useful flagged assets / total flagged assets) × 100.
+
+    Definition here:
+      - total flagged assets: number of distinct asset_id that have at least one flag.
+      - useful flagged assets:
+            asset has at least one flag AND
+            (review_status == 'UNCERTAIN' OR
+             (review_status == 'REVIEWED' AND canonical_class != true_class))
+
+    This treats "flags that lead a reviewer to find an error or uncertainty"
+    as useful. It is an approximation consistent with the project guide.
+    """
+    if flags_df.empty or review_df.empty:
+        return None
+    if "asset_id" not in flags_df.columns:
+        return None
+    if "asset_id" not in review_df.columns or "review_status" not in review_df.columns:
+        return None
+
+    flagged = pd.Series(flags_df["asset_id"].dropna().astype(str).unique())
+    if flagged.empty:
+        return None
+
+    # Usefulness per review row, then one value per asset (first row wins)
+    rs = review_df["review_status"]
+    cc = _column(review_df, "canonical_class")
+    tc = _column(review_df, "true_class")
+    useful = (rs == "UNCERTAIN") | ((rs == "REVIEWED") & (tc != "") & (cc != tc))
+    aid = review_df["asset_id"].fillna("").astype(str)
+    first = ~aid.duplicated(keep="first")
+    useful_by_asset = pd.Series(useful[first].to_numpy(), index=aid[first])
+
+    # Aligned lookup per flagged asset; those missing from the review queue
+    # count as not useful (fill_value keeps the result boolean, no NaN pass)
+    useful_flagged = useful_by_asset.reindex(flagged.to_numpy(), fill_value=False)
+    return float(useful_flagged.mean() * 100.0)
@@ -9,30 +9,37 @@ This script calculates precision for each class by comparing:
 - Version 2 (uir_simulated_v2.jsonl) - ~15% errors
 """
 
+from __future__ import annotations
+
 import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from collections import defaultdict
 from typing import Dict
 
+import numpy as np
+
+# Shared JSON helpers (json_io.py in the project directory)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_io import iter_lines, loads  # noqa: E402
+
 
 def load_predictions(file_path: Path) -> Dict[str, str]:
     """Load predictions: {uid: predicted_class}"""
     predictions: Dict[str, str] = {}
-    with file_path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                data = json.loads(line)
-                entity = data.get("entity", {})
-                uid = entity.get("uid")
-                predicted_class = entity.get("tier_label")
-                if uid and predicted_class:
-                    predictions[str(uid)] = str(predicted_class)
-            except Exception as e:
-                print(f"Error loading {file_path}: {e}")
-                continue
+    for line in iter_lines(file_path):
+        if not line.strip():
+            continue
+        try:
+            data = loads(line)
+            entity = data.get("entity", {})
+            uid = entity.get("uid")
+            predicted_class = entity.get("tier_label")
+            if uid and predicted_class:
+                predictions[str(uid)] = str(predicted_class)
+        except Exception as e:
+            print(f"Error loading {file_path}: {e}")
+            continue
     return predictions
 
 
@@ -41,48 +48,56 @@ def calculate_precision_by_class(
     predictions: Dict[str, str],
     version_name: str,
 ) -> Dict[str, Dict[str, float]]:
-    """Calculate precision, recall, and F1 for each class."""
-
-    # Group by true class
-    true_by_class = defaultdict(list)
-    for uid, true_class in ground_truth.items():
-        true_by_class[true_class].append(uid)
-
-    # Group predictions by predicted class
-    pred_by_class = defaultdict(list)
-    for uid, pred_class in predictions.items():
-        if uid in ground_truth:  # Only count entities in ground truth
-            pred_by_class[pred_class].append(uid)
+    """Calculate precision, recall, and F1 for each class.
+
+    Classes are encoded as integer ids so that TP / support / predicted
+    totals are three np.bincount calls over the ground-truth entities
+    instead of per-class set intersections.
+    """
+    # Class ids over true classes and predictions of ground-truth entities
+    class_ids: Dict[str, int] = {}
+
+    def class_id(c: str | None) -> int:
+        if c is None:
+            return -1  # entity has no prediction
+        return class_ids.setdefault(c, len(class_ids))
+
+    n = len(ground_truth)
+    gt_ids = np.fromiter((class_id(c) for c in ground_truth.values()), dtype=np.intp, count=n)
+    pred_ids = np.fromiter((class_id(predictions.get(uid)) for uid in ground_truth), dtype=np.intp, count=n)
+
+    k = len(class_ids)
+    support = np.bincount(gt_ids, minlength=k)
+    pred_total = np.bincount(pred_ids[pred_ids >= 0], minlength=k)
+    tp = np.bincount(gt_ids[gt_ids == pred_ids], minlength=k)
+    # False positives: predicted as this class BUT not actually this class
+    fp = pred_total - tp
+    # False negatives: actually this class BUT not predicted as this class
+    fn = support - tp
+
+    # Same float64 operations as the scalar formulas, 0.0 where undefined
+    precision = np.divide(tp, tp + fp, out=np.zeros(k), where=(tp + fp) > 0)
+    recall = np.divide(tp, tp + fn, out=np.zeros(k), where=(tp + fn) > 0)
+    denom = precision + recall
+    f1 = np.divide(2 * (precision * recall), denom, out=np.zeros(k), where=denom > 0)
+
+    columns = zip(
+        (precision * 100).tolist(), (recall * 100).tolist(), (f1 * 100).tolist(),
+        tp.tolist(), fp.tolist(), fn.tolist(), support.tolist(),
+    )
+    by_class = dict(zip(class_ids, columns))
 
     results: Dict[str, Dict[str, float]] = {}
-    all_classes = set(list(true_by_class.keys()) + list(pred_by_class.keys()))
-
-    for class_name in sorted(all_classes):
-        true_uids = set(true_by_class[class_name])
-        pred_uids = set(pred_by_class.get(class_name, []))
-
-        # True positives: predicted as this class AND actually this class
-        tp = len(true_uids & pred_uids)
-
-        # False positives: predicted as this class BUT not actually this class
-        fp = len(pred_uids - true_uids)
-
-        # False negatives: actually this class BUT not predicted as this class
-        fn = len(true_uids - pred_uids)
-
-        # Calculate metrics
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
-        recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
-        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0.0
-
+    for class_name in sorted(class_ids):
+        p, r, f, tp_c, fp_c, fn_c, sup = by_class[class_name]
         results[class_name] = {
-            "precision": precision * 100,
-            "recall": recall * 100,
-            "f1": f1 * 100,
-            "tp": tp,
-            "fp": fp,
-            "fn": fn,
-            "support": len(true_uids),  # Number of true instances
+            "precision": p,
+            "recall": r,
+            "f1": f,
+            "tp": tp_c,
+            "fp": fp_c,
+            "fn": fn_c,
+            "support": sup,  # Number of true instances
         }
 
     return results
@@ -133,9 +148,11 @@ def main() -> None:
     v2_file = input_dir / "uir_simulated_v2.jsonl"
 
     print("Loading files...")
-    ground_truth = load_predictions(gt_file)
-    predictions_v1 = load_predictions(v1_file)
-    predictions_v2 = load_predictions(v2_file)
+    # The three files are independent: read/parse them concurrently
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        ground_truth, predictions_v1, predictions_v2 = ex.map(
+            load_predictions, [gt_file, v1_file, v2_file]
+        )
 
     print(f"Ground truth: {len(ground_truth)} entities")
     print(f"Version 1: {len(predictions_v1)} entities")
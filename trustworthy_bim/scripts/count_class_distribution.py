@@ -15,10 +15,14 @@ Fields you can count:
 """
 
 import argparse
-import json
+import sys
 from collections import Counter
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator
+
+# Shared JSON helpers (json_io.py in the project directory)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_io import iter_lines, loads  # noqa: E402
 
 
 def get_nested(d: Dict[str, Any], path: str, default=None):
@@ -36,30 +40,28 @@ def get_nested(d: Dict[str, Any], path: str, default=None):
     return cur
 
 
+def _iter_values(file_path: Path, field: str) -> Iterator[str]:
+    """Yield str(entity[field]) per JSONL record ("<MISSING>" when absent)."""
+    for line in iter_lines(file_path):
+        if not line.strip():
+            continue
+        try:
+            data = loads(line)
+            entity = data.get("entity", {}) or {}
+            value = get_nested(entity, field)
+        except Exception as e:
+            print(f"[WARN] Error parsing line: {e}")
+            continue
+        yield "<MISSING>" if value is None else str(value)
+
+
 def count_classes(file_path: Path, field: str) -> Counter:
     """
     Count occurrences of a given field inside entity.
     - field examples: "tier_label", "ifc_class", "attributes.type"
     """
-    counter: Counter = Counter()
-
-    with file_path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                data = json.loads(line)
-                entity = data.get("entity", {}) or {}
-                value = get_nested(entity, field)
-                if value is None:
-                    value = "<MISSING>"
-                counter[str(value)] += 1
-            except Exception as e:
-                print(f"[WARN] Error parsing line: {e}")
-                continue
-
-    return counter
+    # Counter(iterable) counts in C instead of one += per record
+    return Counter(_iter_values(file_path, field))
 
 
 def main() -> None:
@@ -33,11 +33,38 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 from pathlib import Path
-from typing import Dict, Any, Set, Tuple
+from typing import Callable, Dict, Any, List, Set, Tuple
 
+import numpy as np
 import pandas as pd
 
+# Faster JSON writing when orjson is installed
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+# Parquet caches of the loaded tables when pyarrow is installed
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = pq = None
+
+# Shared JSON helpers (json_io.py in the project directory)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_io import loads  # noqa: E402
+
+# Suffix of the cache written next to each input (git-ignored)
+CACHE_SUFFIX = ".eval_cache.parquet"
+# Bump whenever the loaders below change what they build: caches written
+# with another version are rebuilt
+CACHE_VERSION = 2
+# Parquet schema-metadata key holding the cache key
+_CACHE_META_KEY = b"eval_cache_key"
+
 # Map simulation error types to expected validator flags
 ERROR_TYPE_TO_FLAG: Dict[str, str] = {
     "out_of_range": "OUT_OF_RANGE",
@@ -47,6 +74,51 @@ ERROR_TYPE_TO_FLAG: Dict[str, str] = {
 }
 
 
+def _write_json(path: Path, obj: Any) -> None:
+    """Write obj as 2-space indented UTF-8 JSON (orjson when installed)."""
+    if orjson is not None:
+        try:
+            path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+            return
+        except TypeError:
+            pass  # e.g. non-str keys; stdlib json handles them below
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _cached_frame(src: Path, columns: List[str], build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    build() the table for src, or read it from <src stem>.eval_cache.parquet.
+    The cache is keyed on (CACHE_VERSION, src mtime_ns and size, columns),
+    stored in its Parquet metadata; any mismatch rebuilds it. Without
+    pyarrow this is just build().
+    """
+    if pq is None:
+        return build()
+    cache = src.with_name(src.stem + CACHE_SUFFIX)
+    st = src.stat()
+    key = json.dumps({
+        "version": CACHE_VERSION,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "columns": columns,
+    }).encode("utf-8")
+    try:
+        table = pq.read_table(cache)
+        if (table.schema.metadata or {}).get(_CACHE_META_KEY) == key:
+            return table.to_pandas()
+    except Exception:
+        pass  # missing or unreadable cache: rebuild it
+
+    df = build()
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), _CACHE_META_KEY: key})
+        pq.write_table(table, cache)
+    except Exception:
+        pass  # e.g. read-only directory; the cache is optional
+    return df
+
+
 def load_assets(outdir: Path) -> Tuple[Dict[str, str], Dict[str, str]]:
     """
     Load assets.csv and return:
@@ -57,17 +129,22 @@ def load_assets(outdir: Path) -> Tuple[Dict[str, str], Dict[str, str]]:
     if not assets_csv.exists():
         raise FileNotFoundError(f"assets.csv not found at {assets_csv}")
 
-    df = pd.read_csv(assets_csv)
-    required_cols = {"local_id", "asset_id", "canonical_class"}
-    if not required_cols.issubset(df.columns):
-        raise ValueError(f"assets.csv must contain columns: {required_cols}")
+    columns = ["local_id", "asset_id", "canonical_class"]
+    required_cols = set(columns)
+
+    def build() -> pd.DataFrame:
+        # Every cell read as its raw text: no per-cell str(), ids are not
+        # re-formatted as numbers, and empty cells are "" instead of "nan"
+        df = pd.read_csv(assets_csv, dtype=str, keep_default_na=False)
+        if not required_cols.issubset(df.columns):
+            raise ValueError(f"assets.csv must contain columns: {required_cols}")
+        return df[columns]
 
-    uid_to_asset: Dict[str, str] = {}
-    uid_to_pred_class: Dict[str, str] = {}
-    for _, row in df.iterrows():
-        uid = str(row["local_id"])
-        uid_to_asset[uid] = str(row["asset_id"])
-        uid_to_pred_class[uid] = str(row.get("canonical_class") or "")
+    df = _cached_frame(assets_csv, columns, build)
+
+    uids = df["local_id"].to_numpy(dtype=object)
+    uid_to_asset: Dict[str, str] = dict(zip(uids, df["asset_id"].to_numpy(dtype=object)))
+    uid_to_pred_class: Dict[str, str] = dict(zip(uids, df["canonical_class"].to_numpy(dtype=object)))
 
     return uid_to_asset, uid_to_pred_class
 
@@ -78,16 +155,22 @@ def load_flags(outdir: Path) -> Dict[str, Set[str]]:
     if not flags_csv.exists():
         raise FileNotFoundError(f"asset_flags.csv not found at {flags_csv}")
 
-    df = pd.read_csv(flags_csv)
-    required_cols = {"asset_id", "flag"}
-    if not required_cols.issubset(df.columns):
-        raise ValueError(f"asset_flags.csv must contain columns: {required_cols}")
-
-    by_asset: Dict[str, Set[str]] = {}
-    for _, row in df.iterrows():
-        aid = str(row["asset_id"])
-        flg = str(row["flag"])
-        by_asset.setdefault(aid, set()).add(flg)
+    columns = ["asset_id", "flag"]
+    required_cols = set(columns)
+
+    def build() -> pd.DataFrame:
+        df = pd.read_csv(flags_csv, dtype=str, keep_default_na=False)
+        if not required_cols.issubset(df.columns):
+            raise ValueError(f"asset_flags.csv must contain columns: {required_cols}")
+        return df[columns]
+
+    df = _cached_frame(flags_csv, columns, build)
+    if df.empty:
+        return {}
+    # One groupby collects each asset's flag set
+    aids = df["asset_id"].to_numpy(dtype=object)
+    flgs = pd.Series(df["flag"].to_numpy(dtype=object), dtype=object)
+    by_asset: Dict[str, Set[str]] = flgs.groupby(aids, sort=False).agg(set).to_dict()
     return by_asset
 
 
@@ -99,14 +182,29 @@ def load_sim_ground_truth(sim_jsonl: Path) -> Dict[str, Dict[str, Any]]:
         "true_error_type": str  # one of {NONE, wrong_class, out_of_range, negative, missing_prop}
       }
     """
-    uid_info: Dict[str, Dict[str, Any]] = {}
-    with sim_jsonl.open("r", encoding="utf-8") as f:
+    df = _cached_frame(
+        sim_jsonl, ["uid", "true_class", "true_error_type"], lambda: _parse_sim_ground_truth(sim_jsonl)
+    )
+    return {
+        uid: {"true_class": cls, "true_error_type": et}
+        for uid, cls, et in zip(
+            df["uid"].to_numpy(dtype=object),
+            df["true_class"].to_numpy(dtype=object),
+            df["true_error_type"].to_numpy(dtype=object),
+        )
+    }
+
+
+def _parse_sim_ground_truth(sim_jsonl: Path) -> pd.DataFrame:
+    """One row per uid (last occurrence wins, first-seen order): uid, true_class, true_error_type."""
+    uid_info: Dict[str, Tuple[str, str]] = {}
+    # Binary lines go straight to the parser (no str decode per line)
+    with sim_jsonl.open("rb") as f:
         for line in f:
-            line = line.strip()
-            if not line:
+            if not line.strip():
                 continue
             try:
-                data = json.loads(line)
+                data = loads(line)
             except Exception:
                 continue
 
@@ -126,11 +224,16 @@ def load_sim_ground_truth(sim_jsonl: Path) -> Dict[str, Dict[str, Any]]:
             true_cls = sim_err.get("true_class") or ent.get("tier_label") or ""
             true_cls = str(true_cls)
 
-            uid_info[uid] = {
-                "true_class": true_cls,
-                "true_error_type": err_type,
-            }
-    return uid_info
+            uid_info[uid] = (true_cls, err_type)
+
+    return pd.DataFrame(
+        {
+            "uid": list(uid_info),
+            "true_class": [v[0] for v in uid_info.values()],
+            "true_error_type": [v[1] for v in uid_info.values()],
+        },
+        dtype=str,
+    )
 
 
 def compute_error_type_metrics(
@@ -143,33 +246,35 @@ def compute_error_type_metrics(
     """
     metrics: Dict[str, Dict[str, Any]] = {}
 
-    all_uids = set(uid_info.keys())
+    # One pass over the uids: ground-truth error type, and a uid x flag
+    # presence matrix filled from each uid's flags (only expected flags count)
+    uids = list(uid_info)
+    n = len(uids)
+    gt_type = np.array([uid_info[u].get("true_error_type", "NONE") for u in uids], dtype=object)
+
+    flag_col = {flag: j for j, flag in enumerate(dict.fromkeys(ERROR_TYPE_TO_FLAG.values()))}
+    rows: List[int] = []
+    cols: List[int] = []
+    for i, u in enumerate(uids):
+        aid = uid_to_asset.get(u)
+        for flg in (flags_by_asset.get(aid, ()) if aid else ()):
+            j = flag_col.get(flg)
+            if j is not None:
+                rows.append(i)
+                cols.append(j)
+    pred_flag = np.zeros((n, len(flag_col)), dtype=bool)
+    pred_flag[rows, cols] = True
 
     for etype, expected_flag in ERROR_TYPE_TO_FLAG.items():
-        tp = fp = fn = tn = 0
-        injected = 0
-        caught = 0
-
-        for uid in all_uids:
-            info = uid_info[uid]
-            gt_type = info.get("true_error_type", "NONE")
-            gt_pos = gt_type == etype
-
-            aid = uid_to_asset.get(uid)
-            flgs = flags_by_asset.get(aid, set()) if aid else set()
-            pred_pos = expected_flag in flgs
-
-            if gt_pos:
-                injected += 1
-            if gt_pos and pred_pos:
-                tp += 1
-                caught += 1
-            elif gt_pos and not pred_pos:
-                fn += 1
-            elif (not gt_pos) and pred_pos:
-                fp += 1
-            else:
-                tn += 1
+        gt_pos = gt_type == etype
+        pred_pos = pred_flag[:, flag_col[expected_flag]]
+
+        tp = int(np.count_nonzero(gt_pos & pred_pos))
+        fn = int(np.count_nonzero(gt_pos & ~pred_pos))
+        fp = int(np.count_nonzero(~gt_pos & pred_pos))
+        tn = n - tp - fn - fp
+        injected = tp + fn
+        caught = tp
 
         precision = tp / (tp + fp) * 100.0 if (tp + fp) > 0 else 0.0
         recall = tp / (tp + fn) * 100.0 if (tp + fn) > 0 else 0.0
@@ -198,19 +303,26 @@ def compute_class_confusion(
     Build confusion matrix: true_class vs predicted_class (canonical_class).
     Uses all uids present in both uid_info and uid_to_pred_class.
     """
-    rows = []
-    for uid, info in uid_info.items():
-        if uid not in uid_to_pred_class:
-            continue
-        true_cls = info.get("true_class") or ""
-        pred_cls = uid_to_pred_class.get(uid) or ""
-        rows.append((true_cls, pred_cls))
-
-    if not rows:
+    # uids with a prediction (in uid_info order), then each column in one comprehension
+    uids = [u for u in uid_info if u in uid_to_pred_class]
+    if not uids:
         return pd.DataFrame()
 
-    df = pd.DataFrame(rows, columns=["true_class", "predicted_class"])
-    cm = pd.crosstab(df["true_class"], df["predicted_class"], normalize="index") * 100.0
+    true_cls = [uid_info[u].get("true_class") or "" for u in uids]
+    pred_cls = [uid_to_pred_class[u] or "" for u in uids]
+    # Sorted integer codes per label, then one bincount over the flattened
+    # (true, predicted) cell index gives the count matrix
+    t_codes, t_labels = pd.factorize(pd.Series(true_cls, dtype=object), sort=True)
+    p_codes, p_labels = pd.factorize(pd.Series(pred_cls, dtype=object), sort=True)
+    n_rows, n_cols = len(t_labels), len(p_labels)
+    counts = np.bincount(t_codes * n_cols + p_codes, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+
+    # Row-normalized (every row has at least one uid, so no zero division)
+    cm = pd.DataFrame(
+        counts / counts.sum(axis=1, keepdims=True) * 100.0,
+        index=pd.Index(t_labels, name="true_class"),
+        columns=pd.Index(p_labels, name="predicted_class"),
+    )
     return cm
 
 
@@ -272,7 +384,7 @@ def main() -> None:
         "error_type_metrics": metrics,
         "class_confusion_%": cm.round(4).to_dict() if not cm.empty else {},
     }
-    out_json.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    _write_json(out_json, payload)
     print(f"\n✓ Detailed evaluation saved to: {out_json}")
 
 
@@ -17,8 +17,19 @@ We also add a "sim_error" field at the top-level to record what was injected.
 
 import json
 import random
+import sys
 from pathlib import Path
 
+# Faster JSONL writing when orjson is installed
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+# Shared JSON helpers (json_io.py in the project directory)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_io import iter_lines, loads  # noqa: E402
+
 random.seed(42)
 
 # Project / input directory
@@ -26,36 +37,39 @@ THIS_DIR = Path(__file__).resolve().parent
 PROJECT_DIR = THIS_DIR.parent
 INPUT_DIR = PROJECT_DIR / "input"
 
+# Output lines per writelines() call
+WRITE_BATCH = 4096
+
 ERROR_TYPES = ["wrong_class", "out_of_range", "negative", "missing_prop"]
+NON_BEAM_ERROR_TYPES = ("wrong_class",)
 
 ERROR_PAIRS = {
-    "Slabs": ["Foundation_Slab", "Floors"],
-    "Foundation_Slab": ["Slabs", "Floors"],
-    "Floors": ["Slabs", "Foundation_Slab", "Ceilings"],
-    "External walls (façade)": ["Internal walls", "Curtain Panels"],
-    "Internal walls": ["External walls (façade)"],
-    "Roof": ["Slabs"],
-    "Ceilings": ["Floors"],
-    "Columns (Concrete)": ["Column (Steel)"],
-    "Beam (Concrete)": ["Beam (Steel)"],
-    "Piping": ["Piping fittings"],
-    "Piping fittings": ["Piping"],
-    "Cable Tray": ["Cable Tray fittings"],
-    "Cable Tray fittings": ["Cable Tray"],
-    "Doors": ["Windows"],
-    "Windows": ["Doors"],
+    "Slabs": ("Foundation_Slab", "Floors"),
+    "Foundation_Slab": ("Slabs", "Floors"),
+    "Floors": ("Slabs", "Foundation_Slab", "Ceilings"),
+    "External walls (façade)": ("Internal walls", "Curtain Panels"),
+    "Internal walls": ("External walls (façade)",),
+    "Roof": ("Slabs",),
+    "Ceilings": ("Floors",),
+    "Columns (Concrete)": ("Column (Steel)",),
+    "Beam (Concrete)": ("Beam (Steel)",),
+    "Piping": ("Piping fittings",),
+    "Piping fittings": ("Piping",),
+    "Cable Tray": ("Cable Tray fittings",),
+    "Cable Tray fittings": ("Cable Tray",),
+    "Doors": ("Windows",),
+    "Windows": ("Doors",),
 }
 
+# every class that has wrong-class partners (fallback pool)
+ALL_CLASSES = tuple(ERROR_PAIRS)
+
 # target beam classes for testing
 TARGET_BEAM_CLASSES = {"Beam (Concrete)", "Beam (Steel)"}
 
-NUMERIC_PROP_CANDIDATES = [
-    ("Qto_BeamBaseQuantities", "Length"),
-    ("Qto_BeamBaseQuantities", "NetVolume"),
-    ("Qto_BeamBaseQuantities", "NetSurfaceArea"),
-]
-
-MISSING_PROP_CANDIDATES = NUMERIC_PROP_CANDIDATES[:]
+# numeric / deletable beam properties all live in this one pset
+PSET = "Qto_BeamBaseQuantities"
+NUMERIC_FIELDS = ("Length", "NetVolume", "NetSurfaceArea")
 
 
 def inject_wrong_class(entity):
@@ -66,10 +80,9 @@ def inject_wrong_class(entity):
     if true_class in ERROR_PAIRS:
         wrong_class = random.choice(ERROR_PAIRS[true_class])
     else:
-        all_classes = list(ERROR_PAIRS.keys())
-        if not all_classes:
+        if not ALL_CLASSES:
             return None, None, None
-        wrong_class = random.choice(all_classes)
+        wrong_class = random.choice(ALL_CLASSES)
 
     entity["tier_label"] = wrong_class
     return "wrong_class", "tier_label", true_class
@@ -77,17 +90,13 @@ def inject_wrong_class(entity):
 
 def find_numeric_field(entity):
     """find a usable numeric field in properties"""
-    true_class = entity.get("tier_label")
-    if true_class not in TARGET_BEAM_CLASSES:
+    pset = entity.get("properties", {}).get(PSET)
+    if not isinstance(pset, dict):
         return None, None, None
-
-    props = entity.get("properties", {})
-    for pset_name, field in NUMERIC_PROP_CANDIDATES:
-        pset = props.get(pset_name)
-        if isinstance(pset, dict) and field in pset:
-            val = pset[field]
-            if isinstance(val, (int, float)):
-                return pset_name, field, val
+    for field in NUMERIC_FIELDS:
+        val = pset.get(field)
+        if isinstance(val, (int, float)):
+            return PSET, field, val
     return None, None, None
 
 
@@ -115,57 +124,85 @@ def inject_negative(entity):
 
 
 def inject_missing_prop(entity):
-    true_class = entity.get("tier_label")
-    if true_class not in TARGET_BEAM_CLASSES:
+    props = entity.get("properties", {})
+    pset = props.get(PSET)
+    if not isinstance(pset, dict):
         return None, None, None
 
-    props = entity.get("properties", {})
     # find a property that currently exists and delete it
-    candidates = []
-    for pset_name, field in MISSING_PROP_CANDIDATES:
-        pset = props.get(pset_name)
-        if isinstance(pset, dict) and field in pset:
-            candidates.append((pset_name, field))
-
+    candidates = [field for field in NUMERIC_FIELDS if field in pset]
     if not candidates:
         return None, None, None
 
-    pset_name, field = random.choice(candidates)
-    old_val = props[pset_name].pop(field)
+    field = random.choice(candidates)
+    old_val = pset.pop(field)
     entity["properties"] = props
-    return "missing_prop", f"{pset_name}.{field}", old_val
-
-
-def apply_error(entity, error_type):
-    if error_type == "wrong_class":
-        return inject_wrong_class(entity)
-    elif error_type == "out_of_range":
-        return inject_out_of_range(entity)
-    elif error_type == "negative":
-        return inject_negative(entity)
-    elif error_type == "missing_prop":
-        return inject_missing_prop(entity)
-    else:
+    return "missing_prop", f"{PSET}.{field}", old_val
+
+
+INJECTORS = {
+    "wrong_class": inject_wrong_class,
+    "out_of_range": inject_out_of_range,
+    "negative": inject_negative,
+    "missing_prop": inject_missing_prop,
+}
+
+# error types that only apply to TARGET_BEAM_CLASSES
+BEAM_ONLY_ERRORS = frozenset({"out_of_range", "negative", "missing_prop"})
+
+
+def apply_error(entity, error_type, is_beam=None):
+    """Inject one error; is_beam can be passed in when the caller already knows it."""
+    inject = INJECTORS.get(error_type)
+    if inject is None:
         return None, None, None
+    if error_type in BEAM_ONLY_ERRORS:
+        if is_beam is None:
+            is_beam = entity.get("tier_label") in TARGET_BEAM_CLASSES
+        if not is_beam:
+            return None, None, None
+    return inject(entity)
+
+
+def _dumps_line(data) -> bytes:
+    """One JSONL line as UTF-8 bytes (orjson when installed; stdlib json for
+    what orjson cannot encode, e.g. non-str keys or >64-bit ints)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass
+    return (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
 
 
 def generate_version(input_file: Path, output_file: Path,
-                     error_rate: float, version_name: str):
+                     error_rate: float, version_name: str,
+                     eligible_only: bool = False):
+    """
+    eligible_only: draw the error type only among those that can apply to the
+    entity (wrong_class for non-beams, nothing without a tier_label), so the
+    realized error rate tracks error_rate. Off by default: it changes the
+    seeded sample, and the committed simulated files use the plain draw.
+    """
     errors_by_class = {}
     errors_by_type = {}
     total_errors = 0
     total_count = 0
 
-    with input_file.open("r", encoding="utf-8") as inf, \
-         output_file.open("w", encoding="utf-8") as outf:
+    # Bound once: the per-line draws stay on the seeded `random` stream so the
+    # committed simulated files remain reproducible
+    draw = random.random
+    choose = random.choice
+
+    batch = []
+    with output_file.open("wb") as outf:
 
-        for line in inf:
-            line = line.strip()
-            if not line:
+        for line in iter_lines(input_file):
+            if not line.strip():
                 continue
 
             try:
-                data = json.loads(line)
+                data = loads(line)
             except Exception as e:
                 print(f"Error parsing line: {e}")
                 continue
@@ -174,12 +211,22 @@ def generate_version(input_file: Path, output_file: Path,
             true_class = entity.get("tier_label")
             total_count += 1
 
-            should_error = random.random() < error_rate
+            should_error = draw() < error_rate
             sim_info = {"has_error": False}
 
             if should_error:
-                chosen_error_type = random.choice(ERROR_TYPES)
-                etype, field_name, original_val = apply_error(entity, chosen_error_type)
+                is_beam = true_class in TARGET_BEAM_CLASSES
+                if not eligible_only or is_beam:
+                    candidates = ERROR_TYPES
+                else:
+                    candidates = NON_BEAM_ERROR_TYPES if true_class else ()
+
+                etype = None
+                if candidates:
+                    chosen_error_type = choose(candidates)
+                    etype, field_name, original_val = apply_error(
+                        entity, chosen_error_type, is_beam=is_beam
+                    )
 
                 if etype is not None:
                     total_errors += 1
@@ -198,7 +245,12 @@ def generate_version(input_file: Path, output_file: Path,
             data["entity"] = entity
             data["sim_error"] = sim_info
 
-            outf.write(json.dumps(data, ensure_ascii=False) + "\n")
+            batch.append(_dumps_line(data))
+            if len(batch) >= WRITE_BATCH:
+                outf.writelines(batch)
+                batch.clear()
+
+        outf.writelines(batch)
 
     print(f"\n{version_name} generated: {output_file}")
     print(f"  Total entities: {total_count}")
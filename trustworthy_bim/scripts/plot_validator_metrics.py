@@ -15,13 +15,18 @@ Usage:
 
 from __future__ import annotations
 
-import json
+import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Shared JSON helpers (json_io.py in the project directory)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from json_io import loads  # noqa: E402
+
 try:
     import seaborn as sns
 
@@ -32,17 +37,44 @@ except Exception:
 
 
 def load_eval(path: Path) -> Dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8"))
+    """Parsed eval JSON; each file is read once per process (treat as read-only)."""
+    return _load_eval_cached(str(Path(path).resolve()))
+
+
+@lru_cache(maxsize=None)
+def _load_eval_cached(path_str: str) -> Dict[str, Any]:
+    return loads(Path(path_str).read_bytes())
+
+
+def _confusion_matrix(cm_dict: Dict[str, Dict[str, float]]) -> Tuple[List[str], List[str], np.ndarray]:
+    """
+    Nested {true_class: {pred_class: value}} -> (rows, cols, matrix).
+    Rows keep the dict order, columns their first-seen order; absent cells are 0.
+    """
+    rows = list(cm_dict)
+    col_idx: Dict[str, int] = {}
+    for d in cm_dict.values():
+        for c in d:
+            col_idx.setdefault(c, len(col_idx))
+
+    mat = np.zeros((len(rows), len(col_idx)))
+    for i, r in enumerate(rows):
+        for c, v in cm_dict[r].items():
+            if v is not None:
+                mat[i, col_idx[c]] = v
+    return rows, list(col_idx), mat
 
 
 def plot_error_type_recall(eval_files: Dict[str, Path], output_path: Path) -> None:
     """
     Bar chart: error_type vs recall for multiple datasets (v1, v2, ...).
     """
+    # Each eval file is parsed once and reused for the bars below
+    evals = {name: load_eval(p) for name, p in eval_files.items()}
+
     # Collect union of error types
     error_types: List[str] = []
-    for _, p in eval_files.items():
-        data = load_eval(p)
+    for data in evals.values():
         mets = data.get("error_type_metrics", {})
         for et in mets.keys():
             if et not in error_types:
@@ -61,8 +93,7 @@ def plot_error_type_recall(eval_files: Dict[str, Path], output_path: Path) -> No
 
     colors = ["#2196F3", "#FF9800", "#4CAF50", "#9C27B0", "#F44336"]
 
-    for i, (name, path) in enumerate(eval_files.items()):
-        data = load_eval(path)
+    for i, (name, data) in enumerate(evals.items()):
         mets = data.get("error_type_metrics", {})
         recalls = [mets.get(et, {}).get("recall_%", 0.0) for et in error_types]
         bars = ax.bar(
@@ -114,9 +145,7 @@ def plot_confusion_heatmap(eval_file: Path, name: str, output_path: Path) -> Non
         return
 
     # cm_dict is nested: {true_class: {pred_class: value}}
-    import pandas as pd
-
-    cm = pd.DataFrame.from_dict(cm_dict, orient="index").fillna(0.0)
+    rows, cols, cm = _confusion_matrix(cm_dict)
 
     plt.figure(figsize=(max(8, 0.6 * cm.shape[1] + 4), max(6, 0.6 * cm.shape[0] + 3)))
     ax = plt.gca()
@@ -130,16 +159,16 @@ def plot_confusion_heatmap(eval_file: Path, name: str, output_path: Path) -> Non
             ax=ax,
         )
     else:
-        im = ax.imshow(cm.values, cmap="Blues", aspect="auto")
+        im = ax.imshow(cm, cmap="Blues", aspect="auto")
         plt.colorbar(im, ax=ax, label="Row-normalized accuracy (%)")
 
     ax.set_title(f"Class Mapping Confusion – {name}", fontsize=14, fontweight="bold")
     ax.set_xlabel("Predicted Class", fontsize=12, fontweight="bold")
     ax.set_ylabel("True Class", fontsize=12, fontweight="bold")
-    ax.set_xticks(np.arange(len(cm.columns)))
-    ax.set_xticklabels(cm.columns, rotation=45, ha="right")
-    ax.set_yticks(np.arange(len(cm.index)))
-    ax.set_yticklabels(cm.index)
+    ax.set_xticks(np.arange(len(cols)))
+    ax.set_xticklabels(cols, rotation=45, ha="right")
+    ax.set_yticks(np.arange(len(rows)))
+    ax.set_yticklabels(rows)
     ax.grid(False)
 
     plt.tight_layout()
@@ -11,6 +11,7 @@ Output:
 """
 
 import json
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict
 
@@ -19,7 +20,13 @@ import numpy as np
 
 
 def load_precision(path: Path) -> Dict[str, Dict]:
-    with path.open("r", encoding="utf-8") as f:
+    """Parsed precision JSON; each file is read once per process (treat as read-only)."""
+    return _load_precision_cached(str(Path(path).resolve()))
+
+
+@lru_cache(maxsize=None)
+def _load_precision_cached(path_str: str) -> Dict[str, Dict]:
+    with open(path_str, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
@@ -40,22 +47,21 @@ def main() -> None:
     # Use classes that exist in ground truth (to avoid zero-support noise)
     classes = sorted(gt.keys())
 
-    precisions_gt = [gt[c]["precision"] for c in classes]
-    precisions_v1 = [v1.get(c, {}).get("precision", 0.0) for c in classes]
-    precisions_v2 = [v2.get(c, {}).get("precision", 0.0) for c in classes]
-    supports = [gt[c]["support"] for c in classes]
+    precisions_gt = np.array([gt[c]["precision"] for c in classes], dtype=float)
+    precisions_v1 = np.array([v1.get(c, {}).get("precision", 0.0) for c in classes], dtype=float)
+    precisions_v2 = np.array([v2.get(c, {}).get("precision", 0.0) for c in classes], dtype=float)
+    supports = np.array([gt[c]["support"] for c in classes], dtype=float)
 
     # Optionally filter to classes with reasonable support
-    filtered = [
-        (c, pg, p1, p2, s)
-        for c, pg, p1, p2, s in zip(classes, precisions_gt, precisions_v1, precisions_v2, supports)
-        if s > 5
-    ]
-    if not filtered:
+    mask = supports > 5
+    if not mask.any():
         print("No classes with sufficient support to plot.")
         return
 
-    classes, precisions_gt, precisions_v1, precisions_v2, supports = zip(*filtered)
+    classes = np.array(classes, dtype=object)[mask]
+    precisions_gt = precisions_gt[mask]
+    precisions_v1 = precisions_v1[mask]
+    precisions_v2 = precisions_v2[mask]
 
     x = np.arange(len(classes))
     width = 0.25
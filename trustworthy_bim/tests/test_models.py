@@ -0,0 +1,57 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pydantic")
+from pydantic import ValidationError
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_DIR))
+
+from models import UIRPack  # noqa: E402
+
+
+def _real_pack():
+    with (PROJECT_DIR / "input" / "uir_enriched.jsonl").open(encoding="utf-8") as f:
+        for line in f:
+            pack = json.loads(line)
+            if pack.get("neighbors"):
+                return pack
+    pytest.skip("no pack with neighbors in uir_enriched.jsonl")
+
+
+def test_real_pack_round_trips():
+    raw = _real_pack()
+    pack = UIRPack(**raw)
+
+    dumped = pack.model_dump(by_alias=True)
+    assert dumped["entity"]["uid"] == raw["entity"]["uid"]
+    assert dumped["entity"]["properties"] == raw["entity"].get("properties", {})
+    assert [n["class"] for n in dumped["neighbors"]] == [n.get("class") for n in raw["neighbors"]]
+    assert pack.neighbors[0].class_ == raw["neighbors"][0].get("class")
+
+
+def test_unknown_keys_dump_at_top_level():
+    pack = UIRPack(
+        entity={"uid": "a", "custom": 1},
+        neighbors=[{"class": "Pipe", "note": "x"}],
+        retrieved_docs=[{"doc_id": "d", "page": 3}],
+    )
+    dumped = pack.model_dump(by_alias=True)
+    assert dumped["entity"]["custom"] == 1
+    assert dumped["neighbors"][0] == {
+        "rel": None, "direction": None, "class": "Pipe", "name": None, "uid": None, "note": "x",
+    }
+    assert dumped["retrieved_docs"][0]["page"] == 3
+
+
+@pytest.mark.parametrize("bad", [
+    {"entity": {}},                                          # uid missing
+    {"entity": {"uid": "a", "properties": 3}},               # wrong field type
+    {"entity": {"uid": "a"}, "retrieved_docs": [{"score": "x"}]},
+])
+def test_invalid_pack_raises_validation_error(bad):
+    with pytest.raises(ValidationError):
+        UIRPack(**bad)
@@ -1,10 +1,133 @@
+from functools import lru_cache
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
 def _to_float(x):
+    # Exact floats pass through and None skips the raised TypeError; anything
+    # else (ints included: huge ones overflow) keeps the guarded float()
+    if type(x) is float:
+        return x
+    if x is None:
+        return None
     try:
         return float(x)
     except Exception:
         return None
 
 
+class _Category(NamedTuple):
+    unit: str  # canonical unit
+    assume_note: str  # notes when no unit is given
+    # unit alias -> (converter or None for no change, notes)
+    units: Dict[str, Tuple[Optional[Callable[[float], float]], str]]
+    lower: bool = True  # match unit aliases case-insensitively
+    no_value_note: bool = False  # notes "no_value" instead of assume_note when v is None
+
+
+# Converters keep the original arithmetic (e.g. v / 1000.0, not v * 1e-3)
+_OK = (None, "ok")
+_LENGTH_UNITS = {
+    **dict.fromkeys(("m", "meter", "metre"), _OK),
+    "mm": (lambda v: v / 1000.0, "mm_to_m"),
+    "cm": (lambda v: v / 100.0, "cm_to_m"),
+    **dict.fromkeys(("ft", "feet"), (lambda v: v * 0.3048, "ft_to_m")),
+    **dict.fromkeys(("inch", "in"), (lambda v: v * 0.0254, "in_to_m")),
+}
+
+_CATEGORIES = {
+    # Power → kW
+    "power": _Category("kW", "assume_kw", {
+        "kw": _OK,
+        "w": (lambda v: v / 1000.0, "w_to_kw"),
+        "hp": (lambda v: v * 0.7457, "hp_to_kw"),
+    }, no_value_note=True),
+    # Flow → L/s
+    "flow": _Category("L/s", "assume_Lps", {
+        **dict.fromkeys(("l/s", "lps", "l/sec"), _OK),
+        **dict.fromkeys(("m3/h", "m³/h", "m^3/h"), (lambda v: v * 1000 / 3600, "m3h_to_Lps")),
+    }, no_value_note=True),
+    # Length → m (height and the other distance properties included)
+    "length": _Category("m", "assume_m", _LENGTH_UNITS),
+    # Weight → kg
+    "weight": _Category("kg", "assume_kg", {
+        **dict.fromkeys(("kg", "kilogram"), _OK),
+        **dict.fromkeys(("g", "gram"), (lambda v: v / 1000.0, "g_to_kg")),
+        **dict.fromkeys(("ton", "t"), (lambda v: v * 1000.0, "ton_to_kg")),
+        **dict.fromkeys(("lb", "lbs", "pound"), (lambda v: v * 0.453592, "lb_to_kg")),
+    }),
+    # Area → m²
+    "area": _Category("m²", "assume_m2", dict.fromkeys(("m2", "m²"), _OK)),
+    # Volume → m³
+    "volume": _Category("m³", "assume_m3", dict.fromkeys(("m3", "m³"), _OK)),
+    # Angle properties → degrees
+    "angle": _Category("deg", "assume_deg", {
+        **dict.fromkeys(("deg", "degree", "degrees", "°"), _OK),
+        **dict.fromkeys(("rad", "radian", "radians"), (lambda v: v * 57.295779513, "rad_to_deg")),
+    }),
+    # ThermalTransmittance (U-value) → W/(m²·K)
+    "thermal_u": _Category("W/(m²·K)", "assume_W_per_m2K", {
+        **dict.fromkeys(("w/(m²·k)", "w/(m2·k)", "w/(m²k)", "w/(m2k)", "w/m²k", "w/m2k"), _OK),
+        **dict.fromkeys(("btu/(h·ft²·°f)", "btu/(h·ft2·°f)"), (lambda v: v * 5.678263337, "btu_to_W_per_m2K")),
+    }),
+    # Thermal Resistance (R-value) → m²·K/W
+    "thermal_r": _Category("m²·K/W", "assume_m2K_per_W", {
+        **dict.fromkeys(("m²·k/w", "m2·k/w", "m²k/w", "m2k/w"), _OK),
+        **dict.fromkeys(("ft²·h·°f/btu", "ft2·h·°f/btu", "ft²·°f·h/btu"), (lambda v: v * 0.1761101838, "ft2Fh_to_m2K_per_W")),
+    }),
+    # Temperature → °C (units matched case-sensitively)
+    "temperature": _Category("°C", "assume_C", {
+        **dict.fromkeys(("°C", "C", "c"), _OK),
+        **dict.fromkeys(("°F", "F", "f"), (lambda v: (v - 32) * 5 / 9, "F_to_C")),
+    }, lower=False),
+}
+
+# Lowercased property name → category in _CATEGORIES
+_CATEGORY_NAMES = {
+    "power": ["power", "rated_power", "kw", "power_kw"],
+    "flow": ["flow", "flow_rate", "q"],
+    "length": [
+        "length", "diameter", "width", "height", "depth", "thickness",
+        # additional length/distance properties
+        "perimeter", "invertelevation", "span", "offset", "baseoffset", "topoffset", "heightoffsetfromlevel", "levelopset", "sillheight", "headheight", "defaultheadheight", "roughheight", "roughwidth", "unconnectedheight", "heighttotoplastrail", "nosinglength", "riserheight", "treadlength", "treadlengthatinnerside", "treadlengthatoffset", "walkinglineoffset", "doorpanelheight", "doorpanelwidth", "doorpaneloffset", "windowboardextension", "windowboardprojection", "cilldepth", "cillextension", "cillprojection", "cavitycloserdepth", "cavitycloseroffsetfromext", "cavitycloserwidth", "framedepth", "framethickness", "stopthickness", "stopdepth", "fascia depth", "bas extension distance", "top extension distance", "extrusionstart", "extrusionend", "undercut",
+    ],
+    "weight": ["weight", "mass", "total_weight"],
+    "area": ["area", "netarea", "grossarea", "grosssidearea", "netsidearea", "grosssurfacearea", "netsurfacearea", "grossceilingarea", "grossfootprintarea", "outersurfacearea", "totalarea", "projectedarea", "crosssectionarea"],
+    "volume": ["volume", "netvolume", "grossvolume"],
+    "angle": ["pitchangle", "slope", "roll", "angle"],
+    "thermal_u": ["thermaltransmittance", "heat transfer coefficient (u)", "u-value", "u_value"],
+    "thermal_r": ["thermal resistance (r)", "thermal resistance", "r-value", "r_value"],
+    "temperature": ["temperature", "temp", "setpoint"],
+}
+_NAME_CATEGORY = {name: _CATEGORIES[cat] for cat, names in _CATEGORY_NAMES.items() for name in names}
+
+
+# (converter, unit_norm, notes, notes when the value is not a number)
+_Plan = Tuple[Optional[Callable[[float], float]], str, str, str]
+
+
+@lru_cache(maxsize=32768)
+def _plan(name: Optional[str], unit: Optional[str]) -> Optional[_Plan]:
+    """
+    How to normalize property `name` given in `unit`; None means "noop".
+    Keyed on the raw name, so a repeated name is not lowercased again.
+    Only (name, unit) is cached: the value is applied afterwards, so equal
+    but distinct floats (0.0 / -0.0) never share a cached result.
+    """
+    cat = _NAME_CATEGORY.get((name or "").lower())
+    if cat is None:
+        return None
+    if unit is None:
+        return None, cat.unit, cat.assume_note, "no_value" if cat.no_value_note else cat.assume_note
+    conv = cat.units.get(unit.lower() if cat.lower else unit)
+    if conv is None:
+        return None
+    fn, notes = conv
+    return fn, cat.unit, notes, notes
+
+
 def normalize(name: str, value, unit: str | None):
     """
     Return: (value_norm, unit_norm, notes)
@@ -13,129 +136,90 @@ def normalize(name: str, value, unit: str | None):
         return None, unit, "no_value"
     v = _to_float(value)
 
-    n = (name or "").lower()
+    try:
+        plan = _plan(name, unit)
+    except TypeError:  # unhashable name/unit: resolve without the cache
+        plan = _plan.__wrapped__(name, unit)
 
-    # Power → kW
-    if n in ["power", "rated_power", "kw", "power_kw"]:
-        if unit is None:
-            return v, "kW", "assume_kw" if v is not None else "no_value"
-        u = unit.lower()
-        if u in ["kw"]:
-            return v, "kW", "ok"
-        if u in ["w"]:
-            return (v / 1000.0 if v is not None else None), "kW", "w_to_kw"
-        if u in ["hp"]:
-            return (v * 0.7457 if v is not None else None), "kW", "hp_to_kw"
+    if plan is None:
+        # Default
+        return v, unit, "noop"
+    fn, unit_norm, notes, notes_no_value = plan
+    if v is None:
+        return None, unit_norm, notes_no_value
+    return (fn(v) if fn is not None else v), unit_norm, notes
 
-    # Flow → L/s
-    if n in ["flow", "flow_rate", "q"]:
-        if unit is None:
-            return v, "L/s", "assume_Lps" if v is not None else "no_value"
-        u = unit.lower()
-        if u in ["l/s", "lps", "l/sec"]:
-            return v, "L/s", "ok"
-        if u in ["m3/h", "m³/h", "m^3/h"]:
-            return (v * 1000 / 3600 if v is not None else None), "L/s", "m3h_to_Lps"
-
-    # --- Length → m (height included)
-    if n in ["length", "diameter", "width", "height", "depth", "thickness"]:
-        if unit is None:
-            return v, "m", "assume_m"
-        
-        u = unit.lower()
-        if u in ["m", "meter", "metre"]:
-            return v, "m", "ok"
-        if u == "mm":
-            return (v / 1000.0 if v is not None else None), "m", "mm_to_m"
-        if u in ["cm"]:
-            return (v / 100.0 if v is not None else None), "m", "cm_to_m"
-        if u in ["ft", "feet"]:
-            return (v * 0.3048 if v is not None else None), "m", "ft_to_m"
-        if u in ["inch", "in"]:
-            return (v * 0.0254 if v is not None else None), "m", "in_to_m"
-
-    # --- NEW: Weight → kg ---------------------------------------------
-    if n in ["weight", "mass", "total_weight"]:
-        if unit is None:
-            return v, "kg", "assume_kg"
-        
-        u = unit.lower()
-        if u in ["kg", "kilogram"]:
-            return v, "kg", "ok"
-        if u in ["g", "gram"]:
-            return (v / 1000.0 if v is not None else None), "kg", "g_to_kg"
-        if u in ["ton", "t"]:
-            return (v * 1000.0 if v is not None else None), "kg", "ton_to_kg"
-        if u in ["lb", "lbs", "pound"]:
-            return (v * 0.453592 if v is not None else None), "kg", "lb_to_kg"
 
-    # Area → m²
-    if n in ["area", "netarea", "grossarea", "netarea", "grossarea", "grosssidearea", "netsidearea", "grosssurfacearea", "netsurfacearea", "grossceilingarea", "grossfootprintarea", "grosssurfacearea", "outersurfacearea", "totalarea", "projectedarea", "crosssectionarea"]:
-        if unit is None or (unit and unit.lower() in ["m2", "m²"]):
-            return v, "m²", "ok" if unit else "assume_m2"
+def _to_object_array(x) -> np.ndarray:
+    if isinstance(x, (pd.Series, pd.Index)):
+        return x.to_numpy(dtype=object)
+    return np.asarray(x, dtype=object)
 
-    # Volume → m³
-    if n in ["volume", "netvolume", "grossvolume"]:
-        if unit is None or (unit and unit.lower() in ["m3", "m³"]):
-            return v, "m³", "ok" if unit else "assume_m3"
-    
-    # Additional length/distance properties → m
-    if n in ["perimeter", "invertelevation", "span", "offset", "baseoffset", "topoffset", "heightoffsetfromlevel", "levelopset", "sillheight", "headheight", "defaultheadheight", "roughheight", "roughwidth", "unconnectedheight", "heighttotoplastrail", "nosinglength", "riserheight", "treadlength", "treadlengthatinnerside", "treadlengthatoffset", "walkinglineoffset", "doorpanelheight", "doorpanelwidth", "doorpaneloffset", "windowboardextension", "windowboardprojection", "cilldepth", "cillextension", "cillprojection", "cavitycloserdepth", "cavitycloseroffsetfromext", "cavitycloserwidth", "framedepth", "framethickness", "stopthickness", "stopdepth", "fascia depth", "bas extension distance", "top extension distance", "extrusionstart", "extrusionend", "undercut", "undercut"]:
-        if unit is None:
-            return v, "m", "assume_m"
-        
-        u = unit.lower()
-        if u in ["m", "meter", "metre"]:
-            return v, "m", "ok"
-        if u == "mm":
-            return (v / 1000.0 if v is not None else None), "m", "mm_to_m"
-        if u in ["cm"]:
-            return (v / 100.0 if v is not None else None), "m", "cm_to_m"
-        if u in ["ft", "feet"]:
-            return (v * 0.3048 if v is not None else None), "m", "ft_to_m"
-        if u in ["inch", "in"]:
-            return (v * 0.0254 if v is not None else None), "m", "in_to_m"
-    
-    # Angle properties → degrees
-    if n in ["pitchangle", "slope", "roll", "angle"]:
-        if unit is None:
-            return v, "deg", "assume_deg"
-        
-        u = unit.lower()
-        if u in ["deg", "degree", "degrees", "°"]:
-            return v, "deg", "ok"
-        if u in ["rad", "radian", "radians"]:
-            return (v * 57.295779513 if v is not None else None), "deg", "rad_to_deg"
-    
-    # Thermal properties → standardized units
-    # ThermalTransmittance (U-value) → W/(m²·K)
-    if n in ["thermaltransmittance", "heat transfer coefficient (u)", "u-value", "u_value"]:
-        if unit is None:
-            return v, "W/(m²·K)", "assume_W_per_m2K"
-        
-        u = unit.lower()
-        if u in ["w/(m²·k)", "w/(m2·k)", "w/(m²k)", "w/(m2k)", "w/m²k", "w/m2k"]:
-            return v, "W/(m²·K)", "ok"
-        if u in ["btu/(h·ft²·°f)", "btu/(h·ft2·°f)"]:
-            return (v * 5.678263337 if v is not None else None), "W/(m²·K)", "btu_to_W_per_m2K"
-    
-    # Thermal Resistance (R-value) → m²·K/W
-    if n in ["thermal resistance (r)", "thermal resistance", "r-value", "r_value"]:
-        if unit is None:
-            return v, "m²·K/W", "assume_m2K_per_W"
-        
-        u = unit.lower()
-        if u in ["m²·k/w", "m2·k/w", "m²k/w", "m2k/w", "m²·k/w"]:
-            return v, "m²·K/W", "ok"
-        if u in ["ft²·h·°f/btu", "ft2·h·°f/btu", "ft²·°f·h/btu"]:
-            return (v * 0.1761101838 if v is not None else None), "m²·K/W", "ft2Fh_to_m2K_per_W"
-
-    # Temperature → °C
-    if n in ["temperature", "temp", "setpoint"]:
-        if unit is None or unit in ["°C", "C", "c"]:
-            return v, "°C", "ok" if unit else "assume_C"
-        if unit in ["°F", "F", "f"]:
-            return ((v - 32) * 5 / 9 if v is not None else None), "°C", "F_to_C"
-
-    # Default
-    return v, unit, "noop"
+
+def normalize_batch(names, values, units) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Column-wise normalize() over equal-length arrays/Series.
+    Return: (value_norm, unit_norm, notes) arrays, row by row the same as
+    normalize(), except that value_norm is float64 with NaN where normalize()
+    gives None. Missing names/units (None or NaN) are treated as None.
+    """
+    names_o = _to_object_array(names)
+    units_o = _to_object_array(units)
+    if isinstance(values, (pd.Series, pd.Index)):
+        vals = values.to_numpy()
+    elif isinstance(values, np.ndarray):
+        vals = values
+    else:  # e.g. a list: no implicit str/number coercion by numpy
+        vals = np.asarray(values, dtype=object)
+    n = len(names_o)
+    if len(units_o) != n or len(vals) != n:
+        raise ValueError("names, values and units must have the same length")
+
+    # Values as float64; object input is parsed per element like _to_float
+    if vals.dtype.kind in "biuf":
+        v = vals.astype(np.float64)
+        is_none = v_missing = np.zeros(n, dtype=bool)
+    else:
+        vals = vals.astype(object)
+        parsed = [_to_float(x) for x in vals]
+        is_none = np.fromiter((x is None for x in vals), dtype=bool, count=n)
+        v_missing = np.fromiter((p is None for p in parsed), dtype=bool, count=n)
+        v = np.array([np.nan if p is None else p for p in parsed], dtype=np.float64)
+
+    # One plan per distinct (name, unit) pair; NA codes are -1
+    n_codes, n_uniq = pd.factorize(names_o)
+    u_codes, u_uniq = pd.factorize(units_o)
+    pair = (n_codes + 1).astype(np.int64) * (len(u_uniq) + 1) + (u_codes + 1)
+    inverse, keys = pd.factorize(pair)
+
+    out_v = v.copy()
+    out_unit = units_o.copy()
+    out_notes = np.empty(n, dtype=object)
+    out_notes[:] = "noop"
+
+    # Row indices grouped by pair
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(keys)))[:-1]
+    for key, rows in zip(keys, np.split(order, bounds)):
+        nc, uc = divmod(int(key), len(u_uniq) + 1)
+        name = n_uniq[nc - 1] if nc else None
+        unit = u_uniq[uc - 1] if uc else None
+        try:
+            plan = _plan(name, unit)
+        except TypeError:
+            plan = _plan.__wrapped__(name, unit)
+        if plan is None:
+            continue
+
+        fn, unit_norm, notes, notes_no_value = plan
+        out_unit[rows] = unit_norm
+        out_notes[rows] = notes
+        if notes_no_value != notes:
+            out_notes[rows[v_missing[rows]]] = notes_no_value
+        if fn is not None:
+            out_v[rows] = fn(v[rows])
+
+    # value None short-circuits before any category handling
+    out_unit[is_none] = units_o[is_none]
+    out_notes[is_none] = "no_value"
+    return out_v, out_unit, out_notes
@@ -1,6 +1,16 @@
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, FrozenSet, Iterable, List, NamedTuple, Tuple, Optional
 import math
 
+import numpy as np
+
+# Largest magnitude up to which every int converts to float exactly
+_EXACT_INT = 2 ** 53
+
+_EMPTY: FrozenSet[Any] = frozenset()
+
+# dict.get default that no property value can be
+_MISSING = object()
+
 def _is_number(x: Any) -> bool:
     """Return True if x is an int/float and not NaN."""
     return isinstance(x, (int, float)) and not (isinstance(x, float) and math.isnan(x))
@@ -23,31 +33,119 @@ def check_required_props(
     flags: List[Tuple[str, str]] = []
     must = required_props_for_class(canonical_class, rp_table)
     for k in must:
-        if k not in props_flat or props_flat.get(k) in (None, "", []):
+        v = props_flat.get(k, _MISSING)
+        if v is _MISSING or v is None or v == "" or v == []:
             flags.append(("MISSING_REQUIRED_PROPERTY", f"{k}"))
     return flags
 
+def _exact_float(x: Any) -> bool:
+    """True if float(x) is exact, so comparing as float64 matches Python's comparison."""
+    return isinstance(x, float) or (isinstance(x, int) and -_EXACT_INT <= x <= _EXACT_INT)
+
+class RangeViolation(NamedTuple):
+    row: int  # index into props_rows
+    name: str
+    value: Any
+    lo: Optional[float]
+    hi: Optional[float]
+
+class _RangeRows:
+    """
+    Accumulates the rows range_violations() checks (configured range and a
+    numeric value), so the row loop can be shared with other checks.
+    """
+    __slots__ = ("range_table", "rows", "names", "values", "codes", "pos", "exact")
+
+    def __init__(self, range_table: Dict[str, Dict[str, float]]):
+        self.range_table = range_table
+        # `codes` indexes each row's property name in `pos` / the bounds list
+        self.rows: List[int] = []
+        self.names: List[Any] = []
+        self.values: List[Any] = []
+        self.codes: List[int] = []
+        self.pos: Dict[Any, int] = {}
+        self.exact = True
+
+    def add(self, row: int, p: Dict[str, Any]) -> None:
+        name = p.get("name")
+        if not name or name not in self.range_table:
+            return
+        v = p.get("value_norm")
+        # Exact float/int types first (the common case); subclasses such as
+        # bool or numpy floats take the general isinstance checks
+        t = type(v)
+        if t is float:
+            if v != v:  # NaN
+                return
+        elif t is int and -_EXACT_INT <= v <= _EXACT_INT:
+            pass
+        elif _is_number(v):
+            self.exact = self.exact and _exact_float(v)
+        else:
+            return
+        self.rows.append(row)
+        self.names.append(name)
+        self.values.append(v)
+        self.codes.append(self.pos.setdefault(name, len(self.pos)))
+
+    def violations(self) -> List[RangeViolation]:
+        if not self.values:
+            return []
+        codes, values = self.codes, self.values
+
+        # (min, max) looked up once per property name
+        bounds = [(self.range_table[n].get("min"), self.range_table[n].get("max")) for n in self.pos]
+        exact = self.exact and all(b is None or _exact_float(b) for lo_hi in bounds for b in lo_hi)
+
+        if exact:
+            # One vectorized comparison; a missing bound never fails
+            lo_u = np.array([-np.inf if lo is None else lo for lo, _ in bounds], dtype=np.float64)
+            hi_u = np.array([np.inf if hi is None else hi for _, hi in bounds], dtype=np.float64)
+            idx = np.array(codes, dtype=np.intp)
+            v_arr = np.array(values, dtype=np.float64)
+            failing = np.flatnonzero((v_arr < lo_u[idx]) | (v_arr > hi_u[idx])).tolist()
+        else:
+            # e.g. huge ints or non-numeric bounds: keep Python's comparisons
+            failing = [
+                i for i, (c, v) in enumerate(zip(codes, values))
+                if (bounds[c][0] is not None and v < bounds[c][0])
+                or (bounds[c][1] is not None and v > bounds[c][1])
+            ]
+
+        return [
+            RangeViolation(self.rows[i], self.names[i], values[i], *bounds[codes[i]])
+            for i in failing
+        ]
+
+def range_violations(
+    props_rows: List[Dict[str, Any]],
+    range_table: Dict[str, Dict[str, float]]
+) -> List[RangeViolation]:
+    """
+    Rows whose normalized value falls outside the configured range, in row
+    order, as structured records (no reason strings are built).
+
+    range_table example: {"height": {"min": 0.0, "max": 100.0}}
+    """
+    acc = _RangeRows(range_table)
+    for row, p in enumerate(props_rows):
+        acc.add(row, p)
+    return acc.violations()
+
+def _range_flags(violations: List[RangeViolation]) -> List[Tuple[str, str]]:
+    return [("OUT_OF_RANGE", f"{r.name}={r.value} not in [{r.lo},{r.hi}]") for r in violations]
+
 def check_ranges(
     props_rows: List[Dict[str, Any]],
     range_table: Dict[str, Dict[str, float]]
 ) -> List[Tuple[str, str]]:
     """
     Flag normalized property values that fall outside configured ranges.
+    (Use range_violations() to get the records without formatting reasons.)
 
     range_table example: {"height": {"min": 0.0, "max": 100.0}}
     """
-    flags: List[Tuple[str, str]] = []
-    for p in props_rows:
-        name = p.get("name")
-        if not name or name not in range_table:
-            continue
-        lo: Optional[float] = range_table[name].get("min")
-        hi: Optional[float] = range_table[name].get("max")
-        v = p.get("value_norm")
-        if _is_number(v):
-            if (lo is not None and v < lo) or (hi is not None and v > hi):
-                flags.append(("OUT_OF_RANGE", f"{name}={v} not in [{lo},{hi}]"))
-    return flags
+    return _range_flags(range_violations(props_rows, range_table))
 
 def check_confidence(
     props_rows: List[Dict[str, Any]],
@@ -70,15 +168,22 @@ def check_confidence(
             flags.append(("LOW_AI_CONF", f"prop:{name} conf={c}"))
     return flags
 
+def freeze_rules(simple_rules: Dict[str, Optional[Iterable[str]]]) -> Dict[str, FrozenSet[str]]:
+    """
+    Convert simple neighbor rules to {class: frozenset(expected classes)} once,
+    so check_inconsistent_neighbors does not rebuild a set per call.
+    """
+    return {k: frozenset(v or ()) for k, v in (simple_rules or {}).items()}
+
 def check_inconsistent_neighbors(
     canonical_class: str,
     neighbors: List[Dict[str, Any]],
-    simple_rules: Dict[str, List[str]]
+    simple_rules: Dict[str, Iterable[str]]
 ) -> List[Tuple[str, str]]:
     """
     Flag inconsistent neighbor classes based on simple expected-class rules.
 
-    simple_rules example:
+    simple_rules example (lists, or frozensets from freeze_rules()):
         { "Pump": ["Pipe", "Valve", "Motor"], ... }
 
     If the observed neighbor class set is disjoint from the expected set,
@@ -86,12 +191,15 @@ def check_inconsistent_neighbors(
     """
     flags: List[Tuple[str, str]] = []
     try:
-        expected = set(simple_rules.get(canonical_class, []) or [])
-        observed = {
-            n.get("class")
-            for n in (neighbors or [])
-            if isinstance(n, dict) and n.get("class")
-        }
+        # Most elements have no neighbors or no rule: return before any set work
+        if not neighbors:
+            return flags
+        expected = simple_rules.get(canonical_class) or _EMPTY
+        if not expected:
+            return flags
+        if not isinstance(expected, frozenset):
+            expected = frozenset(expected)
+        observed = {c for n in neighbors if isinstance(n, dict) and (c := n.get("class"))}
         if expected and observed and expected.isdisjoint(observed):
             flags.append((
                 "INCONSISTENT_NEIGHBOR",
@@ -101,3 +209,37 @@ def check_inconsistent_neighbors(
         # Be conservative: swallow errors and return no flags from this check
         pass
     return flags
+
+def validate_all(
+    props_flat: Dict[str, Any],
+    props_rows: List[Dict[str, Any]],
+    canonical_class: str,
+    rp_table: Dict[str, List[str]],
+    range_table: Dict[str, Dict[str, float]],
+    simple_rules: Dict[str, Iterable[str]],
+    cls_conf: float,
+    neighbors: List[Dict[str, Any]],
+    thr_low: float
+) -> List[Tuple[str, str]]:
+    """
+    All checks with a single pass over props_rows (ranges and confidence).
+
+    Returns the same flags, in the same order, as
+    check_required_props + check_ranges + check_confidence
+    + check_inconsistent_neighbors.
+    """
+    ranges = _RangeRows(range_table)
+    conf_flags: List[Tuple[str, str]] = []
+    if _is_number(cls_conf) and cls_conf < thr_low:
+        conf_flags.append(("LOW_AI_CONF", f"class_conf={cls_conf}"))
+    for row, p in enumerate(props_rows):
+        ranges.add(row, p)
+        c = p.get("confidence")
+        if _is_number(c) and c < thr_low:
+            conf_flags.append(("LOW_AI_CONF", f"prop:{p.get('name', '<unknown>')} conf={c}"))
+
+    flags = check_required_props(canonical_class, props_flat, rp_table)
+    flags += _range_flags(ranges.violations())
+    flags += conf_flags
+    flags += check_inconsistent_neighbors(canonical_class, neighbors, simple_rules)
+    return flags
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+yaml_cache.py — YAML rule files parsed once per file version.
+
+Shared by llm_runner.py and metrics.py; kept free of heavy imports so that
+llm_runner does not pull in pandas through metrics.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict
+
+
+@lru_cache(maxsize=8)
+def load_yaml_cached(path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """Parse a YAML file; (mtime_ns, size) are only part of the cache key."""
+    import yaml  # local dependency
+    # libyaml-backed loader when PyYAML was built with it
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=loader) or {}